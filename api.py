@@ -0,0 +1,167 @@
+import json
+from datetime import date
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+
+from autocomplete import artist_names, venue_names
+from forms import CalendarForm
+from models import db, Venue, Artist, Show
+from queries import calendar_criteria, calendar_range
+from utils import search_ranked
+
+# ----------------------------------------------------------------------------#
+# JSON API, version 1.
+# ----------------------------------------------------------------------------#
+# Bulk listings are streamed as NDJSON (one JSON object per line) straight off
+# a server-side cursor, so exporting a whole table uses constant memory and the
+# first bytes go out before the last row is read.
+
+api = Blueprint("api_v1", __name__, url_prefix="/api/v1")
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def stream_ndjson(query, serialize):
+    batch_size = current_app.config["API_STREAM_BATCH_SIZE"]
+
+    def generate():
+        for row in query.yield_per(batch_size):
+            yield json.dumps(serialize(row)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def search_term_and_page():
+    search_term = request.args.get("q", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+    return search_term, page
+
+
+@api.route("/venues")
+def venues():
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label("num_upcoming_shows"),
+    ).order_by(Venue.state, Venue.city, Venue.id)
+    return stream_ndjson(query, lambda venue: venue._asdict())
+
+
+@api.route("/artists")
+def artists():
+    query = db.session.query(
+        Artist.id, Artist.name, Artist.city, Artist.state, Artist.image_link
+    ).order_by(Artist.id)
+    return stream_ndjson(query, lambda artist: artist._asdict())
+
+
+def shows_query(*criteria):
+    return (
+        db.session.query(
+            Show.id,
+            Show.venue_id,
+            Venue.name.label("venue_name"),
+            Show.artist_id,
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+            Show.start_time,
+            Show.end_time,
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+        .filter(*criteria)
+        .order_by(Show.start_time, Show.id)
+    )
+
+
+def serialize_show(show):
+    data = show._asdict()
+    data["start_time"] = show.start_time.isoformat()
+    data["end_time"] = show.end_time.isoformat()
+    return data
+
+
+@api.route("/shows")
+def shows():
+    return stream_ndjson(shows_query(), serialize_show)
+
+
+@api.route("/shows/calendar")
+def show_calendar():
+    # Takes the filters of the /shows/calendar page: start and end dates
+    # (YYYY-MM-DD, inclusive), city, state and genre.
+    form = CalendarForm(request.args, meta={"csrf": False})
+    if not form.validate():
+        return jsonify({"errors": form.errors}), 400
+    start, end = calendar_range(
+        form.start.data,
+        form.end.data,
+        date.today(),
+        current_app.config["CALENDAR_DAYS"],
+    )
+    criteria = calendar_criteria(
+        start, end, form.city.data.strip(), form.state.data, form.genre.data
+    )
+    return stream_ndjson(shows_query(*criteria), serialize_show)
+
+
+def autocomplete(index):
+    # Names starting with ?q= at a word, for the navbar search boxes; ?limit=
+    # asks for fewer than AUTOCOMPLETE_LIMIT.
+    index.refresh(current_app.config["AUTOCOMPLETE_REFRESH_SECONDS"])
+    max_limit = current_app.config["AUTOCOMPLETE_LIMIT"]
+    limit = min(max(request.args.get("limit", max_limit, type=int), 1), max_limit)
+    return jsonify({"data": index.complete(request.args.get("q", ""), limit)})
+
+
+@api.route("/venues/autocomplete")
+def autocomplete_venues():
+    return autocomplete(venue_names)
+
+
+@api.route("/artists/autocomplete")
+def autocomplete_artists():
+    return autocomplete(artist_names)
+
+
+@api.route("/venues/search")
+def search_venues():
+    search_term, page = search_term_and_page()
+    count, venues = search_ranked(
+        db.session,
+        Venue,
+        search_term,
+        page,
+        current_app.config["SEARCH_RESULTS_PER_PAGE"],
+    )
+    return jsonify(
+        {"count": count, "page": page, "data": [venue._asdict() for venue in venues]}
+    )
+
+
+@api.route("/artists/search")
+def search_artists():
+    search_term, page = search_term_and_page()
+    count, artists = search_ranked(
+        db.session,
+        Artist,
+        search_term,
+        page,
+        current_app.config["SEARCH_RESULTS_PER_PAGE"],
+    )
+    return jsonify(
+        {
+            "count": count,
+            "page": page,
+            "data": [artist._asdict() for artist in artists],
+        }
+    )
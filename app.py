@@ -4,7 +4,9 @@
 
 from os import abort
 from flask import (
+    Blueprint,
     Flask,
+    current_app,
     render_template,
     request,
     Response,
@@ -12,164 +14,388 @@ from flask import (
     redirect,
     url_for,
     abort,
+    jsonify,
+    make_response,
+    session,
 )
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
 import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
-from flask_wtf.csrf import CSRFProtect
+from flask_wtf.csrf import CSRFProtect, generate_csrf
 from forms import *
-from operator import itemgetter  # for sorting lists of tuples
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import time
 import re
+from sqlalchemy.exc import IntegrityError
+from werkzeug.local import LocalProxy
 
 # from crypt import methods
-from models import Venue, Artist, Show
-from utils import format_datetime, format_artist_venue
+from models import db, migrate, Venue, Artist, Show
+from api import api
+from archive import archive_shows_command
+from assets import Assets
+import autocomplete
+from autocomplete import artist_names, venue_names
+from bookings import booking_errors, end_time_from_form
+from cache import PageCache
+from counters import count_new_shows, roll_show_counters_command
+from importer import import_data
+from metrics import Metrics
+from queries import (
+    artist_page,
+    artist_page_data,
+    calendar_criteria,
+    calendar_days,
+    calendar_range,
+    detail_shows,
+    page_versions,
+    past_show_history,
+    show_page,
+    show_page_data,
+    venue_areas,
+    venue_listing,
+)
+from replicas import replica_cache_ttl, replica_read, replica_uris
+from utils import (
+    ArtistShow,
+    VenueShow,
+    artist_view,
+    format_datetime,
+    partition_shows,
+    search_ranked,
+    venue_view,
+)
 
 # ----------------------------------------------------------------------------#
 # App Config.
 # ----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-csrf = CSRFProtect(app)
-moment = Moment(app)
-# TODO: connect to a local postgresql database
-app.config.from_object("config")
-db = SQLAlchemy(app)
+csrf = CSRFProtect()
+moment = Moment()
+metrics = Metrics()
+assets = Assets()
+
+
+def create_app(config_object="config", overrides=None):
+    # Builds the application and binds the shared extensions, the views and a
+    # page cache to it; overrides are config values applied on top of
+    # config_object. The engine and its pool are created lazily on first use,
+    # once per worker.
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    app.config.update(overrides or {})
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+    csrf.init_app(app)
+    moment.init_app(app)
+    metrics.init_app(app)
+    assets.init_app(app)
+    app.extensions["page_cache"] = PageCache.from_config(app.config)
+    autocomplete.init_app(app)
+
+    app.register_blueprint(main)
+    app.register_blueprint(api)
+    app.cli.add_command(import_data)
+    app.cli.add_command(roll_show_counters_command)
+    app.cli.add_command(archive_shows_command)
+
+    # ------------------------------------------------------------------------#
+    # Filters.
+    # ------------------------------------------------------------------------#
+
+    app.jinja_env.filters["datetime"] = format_datetime
+
+    if not app.debug:
+        file_handler = FileHandler("error.log")
+        file_handler.setFormatter(
+            Formatter(
+                "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
+            )
+        )
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+        app.logger.info(
+            "Fyyur started; slow queries over %s ms are logged",
+            app.config["SLOW_QUERY_MS"],
+        )
 
+    return app
+
+
+# The HTML views, registered on each application by create_app().
+main = Blueprint("main", __name__)
+
+# The current application's page cache.
+page_cache = LocalProxy(lambda: current_app.extensions["page_cache"])
+metrics.add_value(
+    "fyyur_page_cache_hits_total",
+    "Page cache lookups served from the cache.",
+    lambda: page_cache.hits,
+    kind="counter",
+)
+metrics.add_value(
+    "fyyur_page_cache_misses_total",
+    "Page cache lookups that went to the database.",
+    lambda: page_cache.misses,
+    kind="counter",
+)
 
 # ----------------------------------------------------------------------------#
-# Filters.
+# Cache invalidation.
 # ----------------------------------------------------------------------------#
 
 
-app.jinja_env.filters["datetime"] = format_datetime
+def venue_cache_keys(venue_id):
+    # A venue's name and image appear on its own page, on the /venues and /shows
+    # listings, and on the page of every artist who has a show there.
+    artist_ids = (
+        db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()
+    )
+    return ["venues", "shows", f"venue:{venue_id}"] + [
+        f"artist:{artist_id}" for (artist_id,) in artist_ids
+    ]
+
+
+def artist_cache_keys(artist_id):
+    # Same as venue_cache_keys, mirrored for artists.
+    venue_ids = (
+        db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()
+    )
+    return ["artists", "shows", f"artist:{artist_id}"] + [
+        f"venue:{venue_id}" for (venue_id,) in venue_ids
+    ]
+
 
 # ----------------------------------------------------------------------------#
-# Controllers.
+# Conditional GET.
 # ----------------------------------------------------------------------------#
+# Venue and artist pages carry an ETag and Last-Modified computed by one
+# aggregate query, so a client holding a current copy gets a 304 before the
+# page data is loaded or the template rendered.
+
+
+def page_validators(
+    entity, shows_updated_at, related_updated_at, count, last_started, archived_count
+):
+    # updated_at columns are naive UTC; start_time is naive local time. Archiving
+    # moves shows between count and archived_count, so the tag covers both.
+    # Returns the ETag, Last-Modified and the version of the page data, which
+    # keys its cache entry.
+    changes = [entity.updated_at, shows_updated_at, related_updated_at]
+    last_modified = max(
+        [value.replace(tzinfo=timezone.utc) for value in changes if value]
+        + ([last_started.astimezone(timezone.utc)] if last_started else [])
+    )
+    # Pages also embed the session's CSRF token, so the tag covers the session's
+    # CSRF secret and changes at least twice per token lifetime.
+    token_limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+    token_bucket = int(time.time()) // max(token_limit // 2, 1) if token_limit else None
+    generate_csrf()  # makes sure the session's CSRF secret exists
+    version = (entity.__tablename__, entity.id, last_modified, count, archived_count)
+    tag = repr(version + (session["csrf_token"], token_bucket))
+    return hashlib.sha1(tag.encode()).hexdigest(), last_modified, version
+
+
+def cached_page(cache_key, version):
+    # Page data cached for exactly this version, or None. Cached data older than
+    # the version (cached before a show started, or by a worker that missed an
+    # invalidation) must not be served under the version's ETag.
+    cached = page_cache.get(cache_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    return None
+
+
+def not_modified(etag, last_modified):
+    # A 304 response when the client's copy is current, otherwise None. Pages
+    # carrying a flashed message are always rendered.
+    if "_flashes" in session:
+        return None
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        fresh = (
+            request.if_modified_since is not None
+            and last_modified.replace(microsecond=0) <= request.if_modified_since
+        )
+    if not fresh:
+        return None
+    return with_validators(Response(status=304), etag, last_modified)
 
 
-@app.route("/")
-def index():
-    return render_template("pages/home.html")
+def with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Browsers keep the page but check back on every visit.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
-#  Venues
-#  ----------------------------------------------------------------
+# ----------------------------------------------------------------------------#
+# Show history.
+# ----------------------------------------------------------------------------#
+# Venue and artist pages render their most recent past shows; older ones,
+# including those moved to ShowArchive (see archive.py), are listed newest
+# first by the past-shows pages. Pages are keyset-paginated on start_time: the
+# "before" argument is the start time of the last show on the previous page.
 
 
-@app.route("/venues")
-def venues():
-    # TODO: replace with real venues data.
-    #  num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
+def past_shows_page(name, model, show_key, related, related_key, entity_id):
+    entity = model.query.get(entity_id)
+    if entity is None:
+        abort(404)
 
-    venues = Venue.query.all()
+    per_page = current_app.config["SHOWS_PER_PAGE"]
+    now = datetime.now()
+    before = request.args.get("before", type=datetime.fromisoformat)
+    rows = db.session.execute(
+        past_show_history(
+            show_key,
+            related,
+            related_key,
+            entity_id,
+            min(before or now, now),
+            per_page + 1,
+        )
+    ).all()
+    show_view = VenueShow if model is Venue else ArtistShow
+    shows = [show_view._make(row) for row in rows[:per_page]]
+    next_before = shows[-1].start_time.isoformat() if len(rows) > per_page else None
+    return render_template(
+        "pages/past_shows.html",
+        name=name,
+        entity=entity,
+        shows=shows,
+        before=before,
+        next_before=next_before,
+    )
 
-    # A list of dictionaries, with city, state, and venues serving as the dictionary keys
-    data = []
 
-    # Make a set of all the cities and states that are unique.
-    cities_states = set()
-    for venue in venues:
-        cities_states.add((venue.city, venue.state))  # Add tuple
+# ----------------------------------------------------------------------------#
+# Controllers.
+# ----------------------------------------------------------------------------#
 
-    # Change cities_states set into an ordered list
-    cities_states = list(cities_states)
 
-    # Sorts on second column first (state), then by city.
-    cities_states.sort(key=itemgetter(1, 0))
+@main.route("/")
+def index():
+    return render_template("pages/home.html")
 
-    now = datetime.now()
 
-    # to add city/state locations to the data dictionary, loop through the distinct values.
-    for loc in cities_states:
-        # For this location, see if there are any venues there, and add if so
-        venues_list = []
-        for venue in venues:
-            if (venue.city == loc[0]) and (venue.state == loc[1]):
+#  Venues
+#  ----------------------------------------------------------------
 
-                venue_shows = Show.query.filter_by(venue_id=venue.id).all()
-                num_upcoming = 0
-                for show in venue_shows:
-                    if show.start_time > now:
-                        num_upcoming += 1
 
-                venues_list.append(
-                    {
-                        "id": venue.id,
-                        "name": venue.name,
-                        "num_upcoming_shows": num_upcoming,
-                    }
-                )
+@main.route("/venues")
+@replica_read
+def venues():
+    # One plain query returns every venue with its upcoming show count, ordered
+    # by state, then city (see queries.venue_listing).
+    # An optional ?genre= argument narrows the listing to venues tagged with that genre.
+    genre = request.args.get("genre")
 
-        # After all venues are added to the list for a given location, add it to the data dictionary
-        data.append({"city": loc[0], "state": loc[1], "venues": venues_list})
+    cache_key = f"venues:genre={genre or ''}"
+    data = page_cache.get(cache_key)
+    if data is None:
+        data = venue_areas(db.session.execute(venue_listing(genre)).all())
+        page_cache.set(cache_key, data, ttl=replica_cache_ttl())
 
-    return render_template("pages/venues.html", areas=data)
+    return render_template("pages/venues.html", areas=data, genre=genre)
 
 
-@app.route("/venues/search", methods=["POST"])
+@main.route("/venues/search", methods=["GET", "POST"])
 def search_venues():
-    # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+    # Case-insensitive partial search on venue name, city and state, ranked by relevance.
     # seach for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
-    search_term = request.form.get("search_term", "").strip()
-    venues = Venue.query.filter(Venue.name.ilike("%" + search_term + "%")).all()
+    # The form posts the first page; further pages are plain GET links.
+    search_term = request.values.get("search_term", "").strip()
+    page = max(request.values.get("page", 1, type=int), 1)
+
+    count, venues = search_ranked(
+        db.session,
+        Venue,
+        search_term,
+        page,
+        current_app.config["SEARCH_RESULTS_PER_PAGE"],
+    )
 
     data = [{"id": venue.id, "name": venue.name} for venue in venues]
 
-    response = {"count": len(venues), "data": data}
+    response = {"count": count, "data": data}
 
     return render_template(
         "pages/search_venues.html",
         results=response,
         search_term=search_term,
+        page=page,
+        per_page=current_app.config["SEARCH_RESULTS_PER_PAGE"],
     )
 
 
-@app.route("/venues/<int:venue_id>")
+@main.route("/venues/<int:venue_id>")
+@replica_read
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
-    # TODO: replace with real venue data from the venues table, using venue_id
-    venue = Venue.query.get(venue_id)
+    now = datetime.now()
+    versions = db.session.execute(
+        page_versions(Venue, Show.venue_id, Artist, Show.artist_id, venue_id, now)
+    ).first()
 
     # The user must have manually entered a broken link into the browser.
     # Show 404 page
-    if not venue:
+    if versions is None:
         return abort(404)
 
-    past_shows = (
-        db.session.query(Show)
-        .join(Venue)
-        .filter(Show.venue_id == venue_id)
-        .filter(Show.start_time < datetime.now())
-        .all()
-    )
-    upcoming_shows = (
-        db.session.query(Show)
-        .join(Venue)
-        .filter(Show.venue_id == venue_id)
-        .filter(Show.start_time > datetime.now())
-        .all()
-    )
+    venue = versions[0]
+    etag, last_modified, version = page_validators(*versions)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+
+    cache_key = f"venue:{venue_id}"
+    data = cached_page(cache_key, version)
+    if data is None:
+        # One query loads the rendered columns of every show; past/upcoming are
+        # split around a single timestamp so no show can fall between the two windows.
+        shows = db.session.execute(
+            detail_shows(Show.venue_id, Artist, Show.artist_id, venue_id)
+        ).all()
+        past_shows, upcoming_shows = partition_shows(shows, now)
+
+        data = venue_view(
+            venue,
+            past_shows,
+            upcoming_shows,
+            current_app.config["PAST_SHOWS_LIMIT"],
+            archived_count=versions[-1],
+        )
+        page_cache.set(cache_key, (version, data), ttl=replica_cache_ttl())
 
-    data = format_artist_venue(venue, past_shows, upcoming_shows)
-    return render_template("pages/show_venue.html", venue=data)
+    response = make_response(render_template("pages/show_venue.html", venue=data))
+    return with_validators(response, etag, last_modified)
 
 
-#  Create Venue
-#  ----------------------------------------------------------------
+@main.route("/venues/<int:venue_id>/past-shows")
+@replica_read
+def venue_past_shows(venue_id):
+    # lists every past show of the venue, archived ones included
+    return past_shows_page(
+        "venue", Venue, Show.venue_id, Artist, Show.artist_id, venue_id
+    )
 
 
-@app.route("/venues/create", methods=["GET"])
+@main.route("/venues/create", methods=["GET"])
 def create_venue_form():
     form = VenueForm()
     return render_template("forms/new_venue.html", form=form)
 
 
-@app.route("/venues/create", methods=["POST"])
+@main.route("/venues/create", methods=["POST"])
 def create_venue_submission():
     # TODO: insert form data as a new Venue record in the db, instead
     # TODO: modify data to be the data object returned from db insertion
@@ -192,7 +418,7 @@ def create_venue_submission():
 
     if not form.validate():
         flash(form.errors)
-        return redirect(url_for("create_venue_submission"))
+        return redirect(url_for("main.create_venue_submission"))
     else:
         error_in_update = False
 
@@ -213,6 +439,8 @@ def create_venue_submission():
 
         db.session.add(new_venue)
         db.session.commit()
+        page_cache.invalidate("venues")
+        venue_names.put(new_venue.id, name)
 
         # "website": "https://www.gunsnpetalsband.com",
         # "facebook_link": "https://www.facebook.com/GunsNPetals",
@@ -223,14 +451,12 @@ def create_venue_submission():
         error_in_update = True
         print(f'Exception "{e}" in create_venue_submission()')
         db.session.rollback()
-    finally:
-        db.session.close()
 
     if not error_in_update:
         # on successful db insert, flash success
         # on successful db insert, flash success
         flash("Venue " + request.form["name"] + " was successfully listed!")
-        return redirect(url_for("index"))
+        return redirect(url_for("main.index"))
     else:
         # TODO: on unsuccessful db insert, flash an error instead.
         # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
@@ -239,47 +465,87 @@ def create_venue_submission():
         abort(500)
 
 
-@app.route("/venues/<int:venue_id>", methods=["DELETE"])
+@main.route("/venues/<int:venue_id>", methods=["DELETE"])
 def delete_venue(venue_id):
-    print("Delete requested on id: " + venue_id)
-    # TODO: Complete this endpoint for taking a venue_id, and using
-    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
-
-    # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
-    # clicking that button delete it from the db then redirect the user to the homepage
-
+    print(f"Delete requested on id: {venue_id}")
+    # Deletes the venue and sends the user back to the venue listing.
+    # Handle cases where the session commit could fail.
     venue = Venue.query.get(venue_id)
+    if not venue:
+        return abort(404)
+
+    # Read before the delete; the instance is expired once the session commits.
+    name = venue.name
 
     try:
-        Venue.query.filter_by(id=venue_id).delete()
+        stale_keys = venue_cache_keys(venue_id)
+        # Through the session, so the delete-orphan cascade removes the
+        # venue's VenueGenre rows; a bulk query delete would leave them behind.
+        db.session.delete(venue)
         db.session.commit()
+        page_cache.invalidate(*stale_keys)
+        venue_names.remove(venue_id)
     except Exception as e:
         print(f'Exception "{e}" in delete_venue()')
         db.session.rollback()
-    finally:
-        db.session.close()
-        flash("Venue " + venue.name + " was successfully removed!")
-        return redirect(url_for("/venues"))
+        flash("An error occurred. Venue " + name + " could not be removed.")
+        return abort(500)
+
+    flash("Venue " + name + " was successfully removed!")
+    return redirect(url_for("main.venues"))
 
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route("/artists")
+@main.route("/artists")
+@replica_read
 def artists():
-    # TODO: replace with real data returned from querying the database
+    # Artist directory, one page at a time.
+    # Pages are keyset-paginated on id: "after" continues past the last id of the
+    # previous page and "before" steps back from the first id of the next one, so
+    # each page is one bounded primary-key range scan.
+    # An optional ?genre= argument narrows the listing to artists tagged with that genre.
+    per_page = current_app.config["ARTISTS_PER_PAGE"]
+    genre = request.args.get("genre")
+    after = request.args.get("after", type=int)
+    before = request.args.get("before", type=int)
+
+    cache_key = f"artists:genre={genre or ''}:after={after}:before={before}"
+    cached = page_cache.get(cache_key)
+    if cached is None:
+        rows = db.session.execute(artist_page(genre, after, before, per_page)).all()
+        data, prev_before, next_after = artist_page_data(rows, after, before, per_page)
+        page_cache.set(
+            cache_key, (data, prev_before, next_after), ttl=replica_cache_ttl()
+        )
+    else:
+        data, prev_before, next_after = cached
+
     return render_template(
-        "pages/artists.html", artists=Artist.query.order_by("id").all()
+        "pages/artists.html",
+        artists=data,
+        genre=genre,
+        prev_before=prev_before,
+        next_after=next_after,
     )
 
 
-@app.route("/artists/search", methods=["POST"])
+@main.route("/artists/search", methods=["GET", "POST"])
 def search_artists():
-    # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+    # Case-insensitive partial search on artist name, city and state, ranked by relevance.
     # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
     # search for "band" should return "The Wild Sax Band".
-
-    search_term = request.form.get("search_term", "").strip()
-    artists = Artist.query.filter(Artist.name.ilike("%" + search_term + "%")).all()
+    # The form posts the first page; further pages are plain GET links.
+    search_term = request.values.get("search_term", "").strip()
+    page = max(request.values.get("page", 1, type=int), 1)
+
+    count, artists = search_ranked(
+        db.session,
+        Artist,
+        search_term,
+        page,
+        current_app.config["SEARCH_RESULTS_PER_PAGE"],
+    )
 
     data = [
         {
@@ -289,51 +555,70 @@ def search_artists():
         for artist in artists
     ]
 
-    response = {"count": len(artists), "data": data}
+    response = {"count": count, "data": data}
 
     return render_template(
         "pages/search_artists.html",
         results=response,
         search_term=search_term,
+        page=page,
+        per_page=current_app.config["SEARCH_RESULTS_PER_PAGE"],
     )
 
 
-@app.route("/artists/<int:artist_id>")
+@main.route("/artists/<int:artist_id>")
+@replica_read
 def show_artist(artist_id):
     # shows the artist page with the given artist_id
-    # TODO: replace with real artist data from the artist table, using artist_id
-
-    artist = Artist.query.get(artist_id)
+    now = datetime.now()
+    versions = db.session.execute(
+        page_versions(Artist, Show.artist_id, Venue, Show.venue_id, artist_id, now)
+    ).first()
 
     # The user must have manually entered a broken link into the browser.
     # Show 404 page
-    if not artist:
+    if versions is None:
         abort(404)
 
-    past_shows = (
-        db.session.query(Show)
-        .join(Venue)
-        .filter(Show.artist_id == artist_id)
-        .filter(Show.start_time < datetime.now())
-        .all()
-    )
+    artist = versions[0]
+    etag, last_modified, version = page_validators(*versions)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+
+    cache_key = f"artist:{artist_id}"
+    data = cached_page(cache_key, version)
+    if data is None:
+        # One query loads the rendered columns of every show; past/upcoming are
+        # split around a single timestamp so no show can fall between the two windows.
+        shows = db.session.execute(
+            detail_shows(Show.artist_id, Venue, Show.venue_id, artist_id)
+        ).all()
+        past_shows, upcoming_shows = partition_shows(shows, now)
+
+        data = artist_view(
+            artist,
+            past_shows,
+            upcoming_shows,
+            current_app.config["PAST_SHOWS_LIMIT"],
+            archived_count=versions[-1],
+        )
+        page_cache.set(cache_key, (version, data), ttl=replica_cache_ttl())
 
-    upcoming_shows = (
-        db.session.query(Show)
-        .join(Venue)
-        .filter(Show.artist_id == artist_id)
-        .filter(Show.start_time > datetime.now())
-        .all()
-    )
+    response = make_response(render_template("pages/show_artist.html", artist=data))
+    return with_validators(response, etag, last_modified)
 
-    data = format_artist_venue(artist, past_shows, upcoming_shows)
 
-    return render_template("pages/show_artist.html", artist=data)
+@main.route("/artists/<int:artist_id>/past-shows")
+@replica_read
+def artist_past_shows(artist_id):
+    # lists every past show of the artist, archived ones included
+    return past_shows_page(
+        "artist", Artist, Show.artist_id, Venue, Show.venue_id, artist_id
+    )
 
 
-#  Update
-#  ----------------------------------------------------------------
-@app.route("/artists/<int:artist_id>/edit", methods=["GET"])
+@main.route("/artists/<int:artist_id>/edit", methods=["GET"])
 def edit_artist(artist_id):
     artist = Artist.query.get(artist_id)
     # artist.phone = artist.phone[:3] + "-" + artist.phone[3:6] + "-" + artist.phone[6:]
@@ -343,7 +628,7 @@ def edit_artist(artist_id):
     return render_template("forms/edit_artist.html", form=form, artist=artist)
 
 
-@app.route("/artists/<int:artist_id>/edit", methods=["POST"])
+@main.route("/artists/<int:artist_id>/edit", methods=["POST"])
 def edit_artist_submission(artist_id):
     # TODO: take values from the form submitted, and update existing
     # artist record with ID <artist_id> using the new attributes
@@ -364,7 +649,7 @@ def edit_artist_submission(artist_id):
 
     if not form.validate():
         flash(form.errors)
-        return redirect(url_for("edit_artist_submission", artist_id=artist_id))
+        return redirect(url_for("main.edit_artist_submission", artist_id=artist_id))
     else:
         error_inserting_db = False
 
@@ -373,6 +658,8 @@ def edit_artist_submission(artist_id):
 
         artist.name = name
         artist.genres = genres
+        # Genre rows live in their own table; bump the artist's version explicitly.
+        artist.updated_at = datetime.utcnow()
         artist.city = city
         artist.state = state
         artist.phone = phone
@@ -383,6 +670,8 @@ def edit_artist_submission(artist_id):
         artist.image_link = image_link
 
         db.session.commit()
+        page_cache.invalidate(*artist_cache_keys(artist_id))
+        artist_names.put(artist_id, name)
 
     except Exception as e:
         error_inserting_db = True
@@ -392,13 +681,13 @@ def edit_artist_submission(artist_id):
     if not error_inserting_db:
         # on successful db insert, flash success
         flash("Artist " + name + " was successfully updated!!")
-        return redirect(url_for("show_artist", artist_id=artist_id))
+        return redirect(url_for("main.show_artist", artist_id=artist_id))
     else:
         flash("An error occurred. Artist " + name + " could not be updated.")
-        return redirect(url_for("show_artist", artist_id=artist_id))
+        return redirect(url_for("main.show_artist", artist_id=artist_id))
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["GET"])
+@main.route("/venues/<int:venue_id>/edit", methods=["GET"])
 def edit_venue(venue_id):
     venue = Venue.query.get(venue_id)
     form = VenueForm(obj=venue)
@@ -408,7 +697,7 @@ def edit_venue(venue_id):
     return render_template("forms/edit_venue.html", form=form, venue=venue)
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["POST"])
+@main.route("/venues/<int:venue_id>/edit", methods=["POST"])
 def edit_venue_submission(venue_id):
     # TODO: take values from the form submitted, and update existing
     # venue record with ID <venue_id> using the new attributes
@@ -430,7 +719,7 @@ def edit_venue_submission(venue_id):
 
     if not form.validate():
         flash(form.errors)
-        return redirect(url_for("edit_venue_submission", venue_id=venue_id))
+        return redirect(url_for("main.edit_venue_submission", venue_id=venue_id))
     else:
         error_in_updating = False
 
@@ -439,6 +728,8 @@ def edit_venue_submission(venue_id):
 
         venue.name = name
         venue.genres = genres
+        # Genre rows live in their own table; bump the venue's version explicitly.
+        venue.updated_at = datetime.utcnow()
         venue.city = city
         venue.state = state
         venue.phone = phone
@@ -451,6 +742,8 @@ def edit_venue_submission(venue_id):
         venue.image_link = image_link
 
         db.session.commit()
+        page_cache.invalidate(*venue_cache_keys(venue_id))
+        venue_names.put(venue_id, name)
 
     except Exception as e:
         error_in_updating = True
@@ -460,23 +753,23 @@ def edit_venue_submission(venue_id):
     if not error_in_updating:
         # on successful db insert, flash success
         flash("Venue " + name + " was successfully updated!!")
-        return redirect(url_for("show_venue", venue_id=venue_id))
+        return redirect(url_for("main.show_venue", venue_id=venue_id))
     else:
         flash("An error occurred. Venue " + name + " could not be updated.")
-        return redirect(url_for("show_venue", venue_id=venue_id))
+        return redirect(url_for("main.show_venue", venue_id=venue_id))
 
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
 
-@app.route("/artists/create", methods=["GET"])
+@main.route("/artists/create", methods=["GET"])
 def create_artist_form():
     form = ArtistForm()
     return render_template("forms/new_artist.html", form=form)
 
 
-@app.route("/artists/create", methods=["POST"])
+@main.route("/artists/create", methods=["POST"])
 def create_artist_submission():
     # called upon submitting the new artist listing form
     # TODO: insert form data as a new Venue record in the db, instead
@@ -500,7 +793,7 @@ def create_artist_submission():
 
     if not form.validate():
         flash(form.errors)
-        return redirect(url_for("create_artist_submission"))
+        return redirect(url_for("main.create_artist_submission"))
     else:
         error = False
 
@@ -520,6 +813,8 @@ def create_artist_submission():
 
         db.session.add(new_artist)
         db.session.commit()
+        page_cache.invalidate("artists")
+        artist_names.put(new_artist.id, name)
 
         # "website": "https://www.gunsnpetalsband.com",
         # "facebook_link": "https://www.facebook.com/GunsNPetals",
@@ -530,13 +825,11 @@ def create_artist_submission():
         error = True
         print(f'Exception "{e}" in create_artist_submission()')
         db.session.rollback()
-    finally:
-        db.session.close()
 
     if not error:
         # on successful db insert, flash success
         flash("Artist " + request.form["name"] + " was successfully listed!")
-        return redirect(url_for("index"))
+        return redirect(url_for("main.index"))
     else:
         # TODO: on unsuccessful db insert, flash an error instead.
         flash("An error occurred. Artist " + name + " could not be listed.")
@@ -548,39 +841,90 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 
-@app.route("/shows")
+@main.route("/shows")
+@replica_read
 def shows():
-    # displays list of shows at /shows
-    # TODO: replace with real venues data.
-    data = []
-
-    shows = Show.query.order_by("id").all()
-
-    for show in shows:
-        artist = Artist.query.get(show.artist_id)
-        venue = Venue.query.get(show.venue_id)
-        data.append(
-            {
-                "venue_id": show.venue_id,
-                "venue_name": venue.name,
-                "artist_id": show.artist_id,
-                "artist_name": artist.name,
-                "artist_image_link": artist.image_link,
-                "start_time": format_datetime(str(show.start_time)),
-            }
+    # displays list of shows at /shows, one page at a time.
+    # Pages are keyset-paginated on (start_time, id): the "after" argument is the id
+    # of the last show on the previous page, so every page is a single indexed query
+    # no matter how deep into the listing it is.
+    per_page = current_app.config["SHOWS_PER_PAGE"]
+    after = request.args.get("after", type=int)
+
+    cache_key = f"shows:after={after}"
+    cached = page_cache.get(cache_key)
+    if cached is None:
+        rows = db.session.execute(show_page(after, per_page)).all()
+        data, next_after = show_page_data(rows, per_page)
+        page_cache.set(cache_key, (data, next_after), ttl=replica_cache_ttl())
+    else:
+        data, next_after = cached
+
+    return render_template(
+        "pages/shows.html", shows=data, next_after=next_after, after=after
+    )
+
+
+@main.route("/shows/calendar")
+@replica_read
+def show_calendar():
+    # Shows starting from one date through another (the coming CALENDAR_DAYS
+    # by default), optionally only at venues in a city and/or state and by
+    # artists of a genre, listed by day. Paginated on (start_time, id) like /shows.
+    form = CalendarForm(request.args, meta={"csrf": False})
+    per_page = current_app.config["SHOWS_PER_PAGE"]
+    after = request.args.get("after", type=int)
+    filters = {
+        name: value
+        for name, value in request.args.items()
+        if value and name in form._fields
+    }
+    if not form.validate():
+        return render_template(
+            "pages/calendar.html", form=form, days=[], filters=filters
         )
 
-    return render_template("pages/shows.html", shows=data)
+    start, end = calendar_range(
+        form.start.data,
+        form.end.data,
+        date.today(),
+        current_app.config["CALENDAR_DAYS"],
+    )
+    city = form.city.data.strip()
+    cache_key = (
+        f"shows:calendar:start={start:%Y-%m-%d}:end={end:%Y-%m-%d}:"
+        f"city={city.lower()}:state={form.state.data}:genre={form.genre.data}:"
+        f"after={after}"
+    )
+    cached = page_cache.get(cache_key)
+    if cached is None:
+        criteria = calendar_criteria(start, end, city, form.state.data, form.genre.data)
+        rows = db.session.execute(show_page(after, per_page, *criteria)).all()
+        data, next_after = show_page_data(rows, per_page)
+        cached = (calendar_days(data), next_after)
+        page_cache.set(cache_key, cached, ttl=replica_cache_ttl())
+    days, next_after = cached
+
+    return render_template(
+        "pages/calendar.html",
+        form=form,
+        days=days,
+        start=start,
+        end=end - timedelta(days=1),
+        filters=filters,
+        after=after,
+        next_after=next_after,
+    )
 
 
-@app.route("/shows/create")
+@main.route("/shows/create")
 def create_shows():
     # renders form. do not touch.
     form = ShowForm()
     return render_template("forms/new_show.html", form=form)
 
 
-@app.route("/shows/create", methods=["POST"])
+@main.route("/shows/create", methods=["POST"])
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
     # TODO: insert form data as a new Show record in the db, instead
@@ -594,25 +938,46 @@ def create_show_submission():
 
     if not form.validate():
         flash(form.errors)
-        return redirect(url_for("create_show_submission"))
+        return redirect(url_for("main.create_show_submission"))
     else:
         error_inserting_db = False
 
+    # The venue and artist must exist and be free for the whole show.
+    end_time = end_time_from_form(form)
+    errors = booking_errors(venue_id, artist_id, start_time, end_time)
+    if errors:
+        flash(errors)
+        return redirect(url_for("main.create_show_submission"))
+
     try:
-        new_show = Show(artist_id=artist_id, venue_id=venue_id, start_time=start_time)
+        new_show = Show(
+            artist_id=artist_id,
+            venue_id=venue_id,
+            start_time=start_time,
+            end_time=end_time,
+        )
         db.session.add(new_show)
+        count_new_shows([(venue_id, artist_id, start_time)])
         db.session.commit()
+        page_cache.invalidate(
+            "venues", "shows", f"venue:{venue_id}", f"artist:{artist_id}"
+        )
+    except IntegrityError:
+        # Postgres' exclusion constraints caught a booking made since the check.
+        db.session.rollback()
+        flash(
+            {"start_time": ["The venue or artist was booked for that time meanwhile."]}
+        )
+        return redirect(url_for("main.create_show_submission"))
     except Exception as e:
         error_inserting_db = True
         print(f'Exception "{e}" in create_show_submission()')
         db.session.rollback()
-    finally:
-        db.session.close()
 
     if not error_inserting_db:
         # on successful db insert, flash success
         flash("Show was successfully listed!")
-        return redirect(url_for("index"))
+        return redirect(url_for("main.index"))
     else:
 
         # TODO: on unsuccessful db insert, flash an error instead.
@@ -621,30 +986,47 @@ def create_show_submission():
         abort(500)
 
 
-@app.errorhandler(404)
+#  Status
+#  ----------------------------------------------------------------
+
+
+@main.route("/status/db-pool")
+def db_pool_status():
+    # Connection pool usage of this worker, for spotting exhaustion under load.
+    stats = pool_stats(db.engine.pool)
+    replicas = replica_uris(current_app.config)
+    if replicas:
+        stats["replicas"] = {
+            key: pool_stats(db.get_engine(current_app, bind=key).pool)
+            for key in replicas
+        }
+    return jsonify(stats)
+
+
+def pool_stats(pool):
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
+
+
+@main.app_errorhandler(404)
 def not_found_error(error):
     return render_template("errors/404.html"), 404
 
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def server_error(error):
     return render_template("errors/500.html"), 500
 
 
-if not app.debug:
-    file_handler = FileHandler("error.log")
-    file_handler.setFormatter(
-        Formatter("%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]")
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info("errors")
-
 # ----------------------------------------------------------------------------#
 # Launch.
 # ----------------------------------------------------------------------------#
 
+app = create_app()
+
 # Default port:
 if __name__ == "__main__":
     app.run()
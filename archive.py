@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select
+
+from cache import invalidate_from_cli
+from models import db, Show, ShowArchive
+
+# ----------------------------------------------------------------------------#
+# Show archival.
+# ----------------------------------------------------------------------------#
+# flask archive-shows, run from cron or a scheduler (nightly is plenty), moves
+# shows that started more than ARCHIVE_AFTER_DAYS ago from Show to
+# ShowArchive, one batch per transaction. Show then stays proportional to the
+# recent and upcoming schedule rather than to all history. Venue and artist
+# pages render recent past shows from Show and count the archived ones; older
+# history is read on demand from both tables by the past-shows pages.
+# Archived shows are already counted as past, so the show counters (see
+# counters.py) are unaffected.
+
+ARCHIVED_COLUMNS = ["id", "venue_id", "artist_id", "start_time", "end_time"]
+
+
+def archive_shows(before, batch_size=1000):
+    # Moves every show starting before `before` into ShowArchive. Returns the
+    # number moved and the cache keys of the pages that listed them.
+    moved = 0
+    stale_keys = set()
+    while True:
+        batch = db.session.execute(
+            select(Show.id, Show.venue_id, Show.artist_id)
+            .where(Show.start_time < before)
+            .order_by(Show.start_time)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+
+        ids = [show.id for show in batch]
+        db.session.execute(
+            insert(ShowArchive).from_select(
+                ARCHIVED_COLUMNS,
+                select(*[getattr(Show, name) for name in ARCHIVED_COLUMNS]).where(
+                    Show.id.in_(ids)
+                ),
+            )
+        )
+        db.session.execute(delete(Show).where(Show.id.in_(ids)))
+        db.session.commit()
+
+        moved += len(batch)
+        for show in batch:
+            stale_keys.add(f"venue:{show.venue_id}")
+            stale_keys.add(f"artist:{show.artist_id}")
+    if moved:
+        stale_keys.add("shows")
+    return moved, stale_keys
+
+
+@click.command("archive-shows")
+@click.option(
+    "--days",
+    type=int,
+    help="Archive shows that started more than this many days ago "
+    "(default: ARCHIVE_AFTER_DAYS).",
+)
+@click.option("--batch-size", default=1000, show_default=True)
+@with_appcontext
+def archive_shows_command(days, batch_size):
+    """Move long-past shows from Show to ShowArchive."""
+    if days is None:
+        days = current_app.config["ARCHIVE_AFTER_DAYS"]
+    moved, stale_keys = archive_shows(datetime.now() - timedelta(days=days), batch_size)
+    click.echo(f"{moved} shows archived.")
+    if stale_keys and not invalidate_from_cli(current_app.config, *stale_keys):
+        click.echo(
+            "The web workers' memory caches may list the archived shows for up to "
+            f"{current_app.config['CACHE_TTL']} seconds."
+        )
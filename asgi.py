@@ -0,0 +1,336 @@
+import sys
+from datetime import datetime
+from io import BytesIO
+
+from flask import abort, current_app, g, make_response, render_template, request
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from werkzeug.exceptions import HTTPException
+
+from app import (
+    app,
+    cached_page,
+    not_modified,
+    page_cache,
+    page_validators,
+    with_validators,
+)
+from models import Venue, Artist, Show
+from queries import (
+    artist_page,
+    artist_page_data,
+    detail_shows,
+    page_versions,
+    show_page,
+    show_page_data,
+    venue_areas,
+    venue_listing,
+)
+from replicas import choose_replica, replica_cache_ttl, replica_uris
+from utils import artist_view, partition_shows, search_statements, venue_view
+
+# ----------------------------------------------------------------------------#
+# Asyncio read path.
+# ----------------------------------------------------------------------------#
+# Optional ASGI entry point for high-concurrency deployments:
+#
+#     uvicorn asgi:application
+#
+# The listing, search and detail pages are served by coroutines that query
+# through SQLAlchemy's asyncio engine (asyncpg for Postgres, aiosqlite for
+# SQLite), so a slow search waits on the database without holding a worker
+# thread. They run the same statements (queries.py) and render the same
+# templates under a Flask request context, so hooks, sessions, CSRF and error
+# pages behave as in the WSGI app, and @replica_read views read from the same
+# replicas. Every other route is handed to the WSGI app through asgiref. Needs the optional asgiref package, an async driver and an
+# ASGI server.
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_uri(uri):
+    url = make_url(uri)
+    return str(url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]))
+
+
+# ----------------------------------------------------------------------------#
+# Views.
+# ----------------------------------------------------------------------------#
+# Async counterparts of the read-only views in app.py; each takes an
+# AsyncSession plus the route's arguments.
+
+
+async def venues(session):
+    genre = request.args.get("genre")
+
+    cache_key = f"venues:genre={genre or ''}"
+    data = page_cache.get(cache_key)
+    if data is None:
+        data = venue_areas((await session.execute(venue_listing(genre))).all())
+        page_cache.set(cache_key, data, ttl=replica_cache_ttl())
+
+    return render_template("pages/venues.html", areas=data, genre=genre)
+
+
+async def artists(session):
+    per_page = current_app.config["ARTISTS_PER_PAGE"]
+    genre = request.args.get("genre")
+    after = request.args.get("after", type=int)
+    before = request.args.get("before", type=int)
+
+    cache_key = f"artists:genre={genre or ''}:after={after}:before={before}"
+    cached = page_cache.get(cache_key)
+    if cached is None:
+        result = await session.execute(artist_page(genre, after, before, per_page))
+        cached = artist_page_data(result.all(), after, before, per_page)
+        page_cache.set(cache_key, cached, ttl=replica_cache_ttl())
+    data, prev_before, next_after = cached
+
+    return render_template(
+        "pages/artists.html",
+        artists=data,
+        genre=genre,
+        prev_before=prev_before,
+        next_after=next_after,
+    )
+
+
+async def shows(session):
+    per_page = current_app.config["SHOWS_PER_PAGE"]
+    after = request.args.get("after", type=int)
+
+    cache_key = f"shows:after={after}"
+    cached = page_cache.get(cache_key)
+    if cached is None:
+        result = await session.execute(show_page(after, per_page))
+        cached = show_page_data(result.all(), per_page)
+        page_cache.set(cache_key, cached, ttl=replica_cache_ttl())
+    data, next_after = cached
+
+    return render_template(
+        "pages/shows.html", shows=data, after=after, next_after=next_after
+    )
+
+
+async def search(session, model, template):
+    search_term = request.values.get("search_term", "").strip()
+    page = max(request.values.get("page", 1, type=int), 1)
+    per_page = current_app.config["SEARCH_RESULTS_PER_PAGE"]
+
+    count, rows = search_statements(model, search_term, page, per_page)
+    count = (await session.execute(count)).scalar()
+    rows = (await session.execute(rows)).all()
+
+    return render_template(
+        template,
+        results={
+            "count": count,
+            "data": [{"id": id, "name": name} for id, name in rows],
+        },
+        search_term=search_term,
+        page=page,
+        per_page=per_page,
+    )
+
+
+async def search_venues(session):
+    return await search(session, Venue, "pages/search_venues.html")
+
+
+async def search_artists(session):
+    return await search(session, Artist, "pages/search_artists.html")
+
+
+async def detail(session, name, model, related, show_key, related_key, entity_id):
+    now = datetime.now()
+    versions = (
+        await session.execute(
+            page_versions(model, show_key, related, related_key, entity_id, now)
+        )
+    ).first()
+    if versions is None:
+        abort(404)
+
+    etag, last_modified, version = page_validators(*versions)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+
+    cache_key = f"{name}:{entity_id}"
+    data = cached_page(cache_key, version)
+    if data is None:
+        rows = (
+            await session.execute(
+                detail_shows(show_key, related, related_key, entity_id)
+            )
+        ).all()
+        past_shows, upcoming_shows = partition_shows(rows, now)
+        view = venue_view if model is Venue else artist_view
+        data = view(
+            versions[0],
+            past_shows,
+            upcoming_shows,
+            current_app.config["PAST_SHOWS_LIMIT"],
+            archived_count=versions[-1],
+        )
+        page_cache.set(cache_key, (version, data), ttl=replica_cache_ttl())
+
+    response = make_response(render_template(f"pages/show_{name}.html", **{name: data}))
+    return with_validators(response, etag, last_modified)
+
+
+async def show_venue(session, venue_id):
+    return await detail(
+        session, "venue", Venue, Artist, Show.venue_id, Show.artist_id, venue_id
+    )
+
+
+async def show_artist(session, artist_id):
+    return await detail(
+        session, "artist", Artist, Venue, Show.artist_id, Show.venue_id, artist_id
+    )
+
+
+# Flask endpoint -> async view.
+ASYNC_VIEWS = {
+    "main.venues": venues,
+    "main.artists": artists,
+    "main.shows": shows,
+    "main.search_venues": search_venues,
+    "main.search_artists": search_artists,
+    "main.show_venue": show_venue,
+    "main.show_artist": show_artist,
+}
+
+
+# ----------------------------------------------------------------------------#
+# ASGI application.
+# ----------------------------------------------------------------------------#
+
+
+def wsgi_environ(scope, body):
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": scope.get("server", ("localhost", 80))[0],
+        "SERVER_PORT": str(scope.get("server", ("localhost", 80))[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+def closing_wsgi(wsgi_app):
+    # asgiref's WsgiToAsgi never closes the WSGI result, which is what runs
+    # response.call_on_close() callbacks such as the request metrics.
+    def application(environ, start_response):
+        result = wsgi_app(environ, start_response)
+        try:
+            yield from result
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+    return application
+
+
+class AsyncReadPath:
+    def __init__(self, app):
+        from asgiref.wsgi import WsgiToAsgi
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+        self.app = app
+        self.wsgi = WsgiToAsgi(closing_wsgi(app))
+        self.urls = app.url_map.bind("localhost")
+        options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        self.engine = create_async_engine(
+            async_database_uri(app.config["SQLALCHEMY_DATABASE_URI"]), **options
+        )
+        self.session = sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self.replicas = {
+            key: sessionmaker(
+                create_async_engine(async_database_uri(uri), **options),
+                class_=AsyncSession,
+                expire_on_commit=False,
+            )
+            for key, uri in replica_uris(app.config).items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            try:
+                endpoint, view_args = self.urls.match(scope["path"], scope["method"])
+            except HTTPException:
+                endpoint = None
+            view = ASYNC_VIEWS.get(endpoint)
+            if view is not None:
+                return await self.dispatch(
+                    endpoint, view, view_args, scope, receive, send
+                )
+        await self.wsgi(scope, receive, send)
+
+    async def dispatch(self, endpoint, view, view_args, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        # Mirrors Flask.wsgi_app/full_dispatch_request with an awaited view.
+        with self.app.request_context(wsgi_environ(scope, body)):
+            try:
+                try:
+                    rv = self.app.preprocess_request()
+                    if rv is None:
+                        sessions = self.session
+                        if getattr(
+                            self.app.view_functions[endpoint], "replica_read", False
+                        ):
+                            g.replica = choose_replica()
+                            sessions = self.replicas.get(g.replica, sessions)
+                        async with sessions() as session:
+                            rv = await view(session, **view_args)
+                except Exception as e:
+                    rv = self.app.handle_user_exception(e)
+                response = self.app.finalize_request(rv)
+            except Exception as e:
+                response = self.app.handle_exception(e)
+
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [
+                        (name.lower().encode("latin1"), value.encode("latin1"))
+                        for name, value in response.headers.items()
+                    ],
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": b"" if scope["method"] == "HEAD" else response.get_data(),
+                }
+            )
+            response.close()
+
+
+application = AsyncReadPath(app)
@@ -0,0 +1,225 @@
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+
+import click
+from flask import Blueprint, abort, current_app, request, send_from_directory
+from flask.cli import with_appcontext
+
+# ----------------------------------------------------------------------------#
+# Static asset pipeline.
+# ----------------------------------------------------------------------------#
+# The stylesheets and scripts under static/ are concatenated into a few
+# bundles, minified, written to static/dist/ under content-hashed names and
+# precompressed (gzip always, brotli when the optional brotli package is
+# installed). Templates link them with asset_url("site.css"); since a changed
+# file gets a new name, /assets/ responses are cached by browsers for a year
+# without revalidation.
+
+# Bundle name -> source files, relative to static/, in load order.
+BUNDLES = {
+    "site.css": [
+        "css/bootstrap.min.css",
+        "css/layout.main.css",
+        "css/main.css",
+        "css/main.responsive.css",
+        "css/main.quickfix.css",
+    ],
+    # Loaded synchronously in <head>.
+    "head.js": ["js/libs/modernizr-2.8.2.min.js", "js/libs/moment.min.js"],
+    # Deferred, after jQuery.
+    "site.js": [
+        "js/script.js",
+        "js/libs/bootstrap-3.1.1.min.js",
+        "js/plugins.js",
+    ],
+}
+
+# Files linked on their own (fallbacks and conditional comments), fingerprinted
+# but not bundled.
+SINGLE_FILES = ["js/libs/jquery-1.11.1.min.js", "js/libs/respond-1.4.2.min.js"]
+
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+COMPRESSIBLE = (".css", ".js")
+
+# Accept-Encoding token -> file suffix, in order of preference.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def minify_css(source):
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    source = re.sub(r"\s+", " ", source)
+    source = re.sub(r"\s*([{};,>])\s*", r"\1", source)
+    return source.replace(";}", "}").strip()
+
+
+def minify_js(source):
+    # Needs the optional rjsmin package; the vendored libraries are already
+    # minified, so without it scripts are only concatenated.
+    try:
+        import rjsmin
+    except ImportError:
+        return source
+    return rjsmin.jsmin(source)
+
+
+def fingerprinted(name, content):
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f"{stem}.{digest}{ext}"
+
+
+def write_file(path, content):
+    # Write then rename, so a worker building or serving the same file at the
+    # same time never sees it partially written.
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_compressed(path, content):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=9, mtime=0) as f:
+        f.write(content)
+    write_file(path + ".gz", buffer.getvalue())
+    try:
+        import brotli
+    except ImportError:
+        return
+    write_file(path + ".br", brotli.compress(content, quality=11))
+
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def rebase_css_urls(source, source_path, static_url_path):
+    # Bundles are served from /assets/, so url()s relative to a stylesheet's
+    # own directory are rewritten to absolute /static/ URLs.
+    def rebase(match):
+        quote, url = match.groups()
+        if re.match(r"^([a-z]+:|/|#)", url, re.I):
+            return match.group(0)
+        path, suffix = re.match(r"^([^?#]*)(.*)$", url).groups()
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(source_path), path))
+        return f"url({quote}{static_url_path}/{path}{suffix}{quote})"
+
+    return CSS_URL.sub(rebase, source)
+
+
+def build_assets(static_folder, static_url_path="/static"):
+    # Writes every bundle and single file to static/dist/ and returns the
+    # manifest mapping logical names to fingerprinted file names.
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+
+    outputs = {}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding="utf-8") as f:
+                parts.append(f.read())
+        if name.endswith(".css"):
+            content = minify_css(
+                "\n".join(
+                    rebase_css_urls(part, source, static_url_path)
+                    for part, source in zip(parts, sources)
+                )
+            )
+        else:
+            # The separator keeps one file's last statement from running into the next.
+            content = ";\n".join(minify_js(part) for part in parts)
+        outputs[name] = content.encode("utf-8")
+
+    for source in SINGLE_FILES:
+        with open(os.path.join(static_folder, source), "rb") as f:
+            outputs[source] = f.read()
+
+    manifest = {}
+    for name, content in outputs.items():
+        filename = fingerprinted(os.path.basename(name), content)
+        path = os.path.join(dist, filename)
+        if not os.path.exists(path):
+            # Compressed copies first: once the file exists, they do too.
+            if filename.endswith(COMPRESSIBLE):
+                write_compressed(path, content)
+            write_file(path, content)
+        manifest[name] = filename
+
+    write_file(
+        os.path.join(dist, MANIFEST),
+        json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+    )
+    return manifest
+
+
+class Assets:
+    def __init__(self):
+        self.manifest = {}
+
+    def init_app(self, app):
+        manifest_path = os.path.join(app.static_folder, DIST_DIR, MANIFEST)
+        if app.config["ASSETS_BUILD_ON_START"] or not os.path.exists(manifest_path):
+            self.manifest = build_assets(app.static_folder, app.static_url_path)
+        else:
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+
+        app.register_blueprint(assets_blueprint)
+        app.jinja_env.globals["asset_url"] = self.url
+        app.cli.add_command(build_assets_command)
+
+    def url(self, name):
+        return f"{assets_blueprint.url_prefix}/{self.manifest[name]}"
+
+
+assets_blueprint = Blueprint("assets", __name__, url_prefix="/assets")
+
+
+@assets_blueprint.route("/<path:filename>")
+def serve(filename):
+    dist = os.path.join(current_app.static_folder, DIST_DIR)
+    if filename == MANIFEST:
+        abort(404)
+
+    accepted = request.accept_encodings
+    encoding = None
+    if filename.endswith(COMPRESSIBLE):
+        for token, suffix in ENCODINGS:
+            if accepted[token] and os.path.exists(
+                os.path.join(dist, filename + suffix)
+            ):
+                encoding = token
+                break
+
+    if encoding:
+        response = send_from_directory(
+            dist,
+            filename + dict(ENCODINGS)[encoding],
+            mimetype=mimetypes.guess_type(filename)[0],
+        )
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_from_directory(dist, filename)
+
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = (
+        f"public, max-age={current_app.config['ASSETS_MAX_AGE']}, immutable"
+    )
+    return response
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets_command():
+    """Bundle, fingerprint and precompress the static assets."""
+    manifest = build_assets(current_app.static_folder, current_app.static_url_path)
+    for name, filename in sorted(manifest.items()):
+        click.echo(f"{name} -> {DIST_DIR}/{filename}")
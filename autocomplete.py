@@ -0,0 +1,148 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from flask import current_app
+from sqlalchemy import select
+from werkzeug.local import LocalProxy
+
+from models import db, Venue, Artist
+
+# ----------------------------------------------------------------------------#
+# Name autocomplete.
+# ----------------------------------------------------------------------------#
+# Each worker keeps the venue and artist names in memory as a sorted list of
+# (casefolded name from the start of a word, id), so "blu" finds "Blue Note"
+# and "The Blue Moon" with one bisect and a short scan, without a query. An
+# index is loaded on first use and rebuilt in a background thread once it is
+# older than AUTOCOMPLETE_REFRESH_SECONDS, which picks up names written by
+# other workers or imports; the create, edit and delete handlers update the
+# index of the worker serving them straight away.
+
+WORD = re.compile(r"\w+")
+
+
+def word_starts(name):
+    # The casefolded name from the start of each of its words.
+    folded = name.casefold()
+    return [folded[word.start() :] for word in WORD.finditer(folded)]
+
+
+class NameIndex:
+    def __init__(self, model):
+        self.model = model
+        self.keys = []  # sorted (word start, id)
+        self.names = {}  # id -> name
+        self.loaded_at = None
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()  # held by the one thread loading
+        self.pending = None  # (id, name or None) changes made during a load
+
+    def load(self):
+        with self.lock:
+            self.pending = []
+        try:
+            rows = db.session.execute(select(self.model.id, self.model.name)).all()
+        except Exception:
+            with self.lock:
+                self.pending = None
+            raise
+        names = {row.id: row.name for row in rows}
+        keys = sorted(
+            (start, entity_id)
+            for entity_id, name in names.items()
+            for start in word_starts(name)
+        )
+        with self.lock:
+            # The rows may have been read before changes put or removed while
+            # the load ran, so those are applied again on top of them.
+            pending, self.pending = self.pending, None
+            self.keys, self.names = keys, names
+            for entity_id, name in pending:
+                self._discard(entity_id)
+                if name is not None:
+                    self._add(entity_id, name)
+            self.loaded_at = time.monotonic()
+
+    def refresh(self, max_age):
+        # The first load runs on the calling thread, as there is nothing to
+        # serve without it. Later ones run in a background thread while the
+        # current names are served, and only one thread loads at a time.
+        if self.loaded_at is None:
+            with self.load_lock:
+                if self.loaded_at is None:
+                    self.load()
+        elif time.monotonic() - self.loaded_at > max_age:
+            if self.load_lock.acquire(blocking=False):
+                threading.Thread(
+                    target=self._load_in_background,
+                    args=(current_app._get_current_object(),),
+                    daemon=True,
+                ).start()
+
+    def _load_in_background(self, app):
+        try:
+            with app.app_context():
+                self.load()
+        finally:
+            self.load_lock.release()
+
+    def put(self, entity_id, name):
+        # Adds or renames an entity; an index not loaded yet will read it anyway.
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((entity_id, name))
+            if self.loaded_at is not None:
+                self._discard(entity_id)
+                self._add(entity_id, name)
+
+    def remove(self, entity_id):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((entity_id, None))
+            if self.loaded_at is not None:
+                self._discard(entity_id)
+
+    def _add(self, entity_id, name):
+        self.names[entity_id] = name
+        for start in word_starts(name):
+            insort(self.keys, (start, entity_id))
+
+    def _discard(self, entity_id):
+        name = self.names.pop(entity_id, None)
+        if name is None:
+            return
+        for start in word_starts(name):
+            position = bisect_left(self.keys, (start, entity_id))
+            del self.keys[position]
+
+    def complete(self, prefix, limit):
+        # Up to limit {"id", "name"} dicts for names with a word starting with
+        # prefix, in the order of the matching words.
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        found = {}
+        with self.lock:
+            position = bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(found) < limit:
+                start, entity_id = self.keys[position]
+                if not start.startswith(prefix):
+                    break
+                found.setdefault(entity_id, self.names[entity_id])
+                position += 1
+        return [{"id": entity_id, "name": name} for entity_id, name in found.items()]
+
+
+def init_app(app):
+    # Every application gets its own indexes, since it may use another database.
+    app.extensions["autocomplete"] = {
+        Venue: NameIndex(Venue),
+        Artist: NameIndex(Artist),
+    }
+
+
+# The current application's indexes.
+venue_names = LocalProxy(lambda: current_app.extensions["autocomplete"][Venue])
+artist_names = LocalProxy(lambda: current_app.extensions["autocomplete"][Artist])
@@ -0,0 +1,743 @@
+"""Route benchmark for Fyyur.
+
+Seeds a database with synthetic venues, artists and shows, drives every read
+route through the Flask test client, and records latency, SQL statements and
+peak Python memory per request. Results can be saved as a baseline and later
+runs compared against it:
+
+    python benchmark.py --save-baseline
+    python benchmark.py                       # fails on regressions
+    python benchmark.py --check-scaling 10    # statement counts at 10x data
+    python benchmark.py --database postgresql://... --explain
+    python benchmark.py --concurrency 50      # sync vs asyncio throughput
+    python benchmark.py --startup 5           # per-worker startup time and memory
+    python benchmark.py --format-datetimes 100000   # show time formatting
+
+Runs against a throwaway SQLite file unless --database is given. The baseline
+records the seeded volumes and is only compared with runs over the same ones;
+re-save it whenever the route set changes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+GENRES = ["Blues", "Classical", "Folk", "Hip-Hop", "Jazz", "Rock n Roll", "Soul"]
+STATES = [("San Francisco", "CA"), ("New York", "NY"), ("Austin", "TX")]
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json"
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=2000)
+    parser.add_argument("--artists", type=int, default=5000)
+    parser.add_argument("--shows", type=int, default=50000)
+    parser.add_argument(
+        "--requests", type=int, default=20, help="timed requests per route"
+    )
+    parser.add_argument(
+        "--database", help="database URL (default: temporary SQLite file)"
+    )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="build the schema with the Alembic migrations instead of create_all()",
+    )
+    parser.add_argument(
+        "--with-cache", action="store_true", help="leave the page cache on"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="allowed median latency growth over the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--min-slowdown-ms",
+        type=float,
+        default=2.0,
+        help="ignore latency growth smaller than this, which is mostly timer noise",
+    )
+    parser.add_argument(
+        "--check-scaling",
+        type=int,
+        metavar="FACTOR",
+        help="re-run with FACTOR times the data and fail if any route issues more statements",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="fail if a hot route reads the Show table without seeking an index",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        metavar="N",
+        help="also compare read-route throughput with N concurrent clients on the "
+        "WSGI app (threads) and the asyncio read path in asgi.py",
+    )
+    parser.add_argument(
+        "--startup",
+        type=int,
+        metavar="N",
+        help="instead of the routes, time worker startup in N fresh interpreters: "
+        "importing app, another create_app(), the first engine, and peak memory",
+    )
+    parser.add_argument(
+        "--format-datetimes",
+        type=int,
+        metavar="N",
+        help="instead of the routes, time formatting N show start times with "
+        "utils.format_datetime against the old string re-parsing chain",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+# ----------------------------------------------------------------------------#
+# Data.
+# ----------------------------------------------------------------------------#
+
+
+def seed(db, models, venues, artists, shows, rng):
+    Venue, Artist, Show = models.Venue, models.Artist, models.Show
+    now = datetime.now()
+
+    def genre_rows(key, count):
+        for owner_id in range(1, count + 1):
+            for genre in rng.sample(GENRES, 2):
+                yield {key: owner_id, "genre": genre}
+
+    def insert(table, rows, batch_size=10000):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                db.session.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(table.insert(), batch)
+
+    insert(
+        Venue.__table__,
+        (
+            {
+                "id": i,
+                "name": f"Venue {i}",
+                "city": STATES[i % len(STATES)][0],
+                "state": STATES[i % len(STATES)][1],
+                "address": f"{i} Main St",
+                "phone": "5555555555",
+                "image_link": f"https://example.com/venues/{i}.jpg",
+                "facebook_link": f"https://facebook.com/venue{i}",
+                "website": f"https://venue{i}.example.com",
+                "seeking_talent": i % 2 == 0,
+                "seeking_description": "Looking for local acts",
+            }
+            for i in range(1, venues + 1)
+        ),
+    )
+    insert(models.VenueGenre.__table__, genre_rows("venue_id", venues))
+    insert(
+        Artist.__table__,
+        (
+            {
+                "id": i,
+                "name": f"Artist {i}",
+                "city": STATES[i % len(STATES)][0],
+                "state": STATES[i % len(STATES)][1],
+                "phone": "5555555555",
+                "image_link": f"https://example.com/artists/{i}.jpg",
+                "facebook_link": f"https://facebook.com/artist{i}",
+                "website": f"https://artist{i}.example.com",
+                "seeking_venue": i % 3 == 0,
+                "seeking_description": "Looking for venues",
+            }
+            for i in range(1, artists + 1)
+        ),
+    )
+    insert(models.ArtistGenre.__table__, genre_rows("artist_id", artists))
+    # Shows spread over a year either side of now, so detail pages have both
+    # past and upcoming history. Distinct start minutes and one-minute sets
+    # keep them clear of the double-booking constraints.
+    start_minutes = rng.sample(range(-525600, 525600), shows)
+    insert(
+        Show.__table__,
+        (
+            {
+                "id": i,
+                "venue_id": rng.randint(1, venues),
+                "artist_id": rng.randint(1, artists),
+                "start_time": now + timedelta(minutes=minute),
+                "end_time": now + timedelta(minutes=minute + 1),
+            }
+            for i, minute in enumerate(start_minutes, 1)
+        ),
+    )
+    db.session.commit()
+
+
+# ----------------------------------------------------------------------------#
+# Routes.
+# ----------------------------------------------------------------------------#
+
+
+def routes(args):
+    # (name, method, url, form data, checked by --explain)
+    venue_id = args.venues // 2 or 1
+    artist_id = args.artists // 2 or 1
+    return [
+        ("index", "GET", "/", None, False),
+        ("venues", "GET", "/venues", None, True),
+        ("venues_by_genre", "GET", "/venues?genre=Jazz", None, True),
+        ("show_venue", "GET", f"/venues/{venue_id}", None, True),
+        ("venue_past_shows", "GET", f"/venues/{venue_id}/past-shows", None, True),
+        ("search_venues", "POST", "/venues/search", {"search_term": "Venue 1"}, True),
+        ("artists", "GET", "/artists", None, True),
+        ("artists_page", "GET", f"/artists?after={artist_id}", None, True),
+        ("show_artist", "GET", f"/artists/{artist_id}", None, True),
+        ("artist_past_shows", "GET", f"/artists/{artist_id}/past-shows", None, True),
+        (
+            "search_artists",
+            "POST",
+            "/artists/search",
+            {"search_term": "Artist 1"},
+            True,
+        ),
+        ("shows", "GET", "/shows", None, True),
+        ("shows_page", "GET", f"/shows?after={args.shows // 2 or 1}", None, True),
+        ("calendar", "GET", "/shows/calendar", None, True),
+        (
+            "calendar_filtered",
+            "GET",
+            "/shows/calendar?state=CA&genre=Jazz",
+            None,
+            True,
+        ),
+        ("create_venue_form", "GET", "/venues/create", None, False),
+        ("create_artist_form", "GET", "/artists/create", None, False),
+        ("create_show_form", "GET", "/shows/create", None, False),
+        ("api_venues", "GET", "/api/v1/venues", None, False),
+        ("api_artists", "GET", "/api/v1/artists", None, False),
+        ("api_shows", "GET", "/api/v1/shows", None, False),
+        ("api_calendar", "GET", "/api/v1/shows/calendar?state=CA", None, True),
+        ("api_search_venues", "GET", "/api/v1/venues/search?q=Venue", None, True),
+        ("api_search_artists", "GET", "/api/v1/artists/search?q=Artist", None, True),
+        (
+            "api_autocomplete_venues",
+            "GET",
+            "/api/v1/venues/autocomplete?q=ven",
+            None,
+            False,
+        ),
+        (
+            "api_autocomplete_artists",
+            "GET",
+            "/api/v1/artists/autocomplete?q=art",
+            None,
+            False,
+        ),
+    ]
+
+
+def request(client, method, url, data):
+    response = client.open(url, method=method, data=data)
+    # Drain streamed bodies so their queries are counted too.
+    body = response.get_data()
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method} {url} returned {response.status_code}")
+    return body
+
+
+def measure(app, db, args):
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_engine(app)
+    event.listen(engine, "before_cursor_execute", record)
+    client = app.test_client()
+    results = {}
+    try:
+        for name, method, url, data, explain in routes(args):
+            request(client, method, url, data)  # warm-up
+
+            statements.clear()
+            request(client, method, url, data)
+            route_statements = list(statements)
+
+            timings = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                request(client, method, url, data)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            tracemalloc.start()
+            request(client, method, url, data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            timings.sort()
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+                "statements": len(route_statements),
+                "peak_kib": round(peak / 1024, 1),
+            }
+            if explain and args.explain:
+                results[name]["unindexed_scans"] = unindexed_show_scans(
+                    engine, route_statements
+                )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return results
+
+
+SQLITE_SHOW_SCAN = re.compile(r'SCAN "?Show"?(\s|$)')
+
+
+def unindexed_show_scans(engine, statements):
+    # Plans that read Show without seeking an index to a condition: any SQLite
+    # SCAN of it (only SEARCH is a seek; SCAN ... USING INDEX walks the whole
+    # index), and any Postgres scan node on it without an Index Cond.
+    findings = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            if engine.dialect.name == "sqlite":
+                plan = conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+                lines = [row[-1] for row in plan]
+                bad = [line for line in lines if SQLITE_SHOW_SCAN.match(line)]
+            elif engine.dialect.name == "postgresql":
+                plan = conn.exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + statement, parameters
+                ).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                bad = list(postgres_show_scans(plan[0]["Plan"]))
+            else:
+                return findings
+            if bad:
+                findings.append(
+                    {"statement": " ".join(statement.split())[:200], "plan": bad}
+                )
+    return findings
+
+
+def postgres_show_scans(node):
+    # Scan nodes on Show that have no Index Cond, from a FORMAT JSON plan tree.
+    # A bitmap heap scan takes its condition from the bitmap index scans below.
+    if (
+        node.get("Relation Name") == "Show"
+        and node["Node Type"] != "Bitmap Heap Scan"
+        and "Index Cond" not in node
+    ):
+        yield " ".join(
+            filter(None, [node["Node Type"], node.get("Index Name"), "on Show"])
+        )
+    for child in node.get("Plans", []):
+        yield from postgres_show_scans(child)
+
+
+# Routes served by the asyncio read path in asgi.py.
+ASYNC_ROUTES = {
+    "venues",
+    "venues_by_genre",
+    "show_venue",
+    "search_venues",
+    "artists",
+    "artists_page",
+    "show_artist",
+    "search_artists",
+    "shows",
+    "shows_page",
+}
+
+
+async def asgi_request(application, method, url, data):
+    path, _, query = url.partition("?")
+    body = urlencode(data).encode() if data else b""
+    headers = [(b"host", b"localhost"), (b"content-length", str(len(body)).encode())]
+    if data:
+        headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 0),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await application(scope, receive, send)
+    if status[0] >= 400:
+        raise RuntimeError(f"{method} {url} returned {status[0]}")
+
+
+def measure_throughput(app, args):
+    # Requests per second over the read routes, each of N clients cycling
+    # through them args.requests times.
+    reads = [route for route in routes(args) if route[0] in ASYNC_ROUTES]
+    total = args.concurrency * args.requests * len(reads)
+    results = {}
+
+    def sync_client(_):
+        client = app.test_client()
+        for _ in range(args.requests):
+            for name, method, url, data, _explain in reads:
+                request(client, method, url, data)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(sync_client, range(args.concurrency)))
+    results["wsgi"] = total / (time.perf_counter() - started)
+
+    try:
+        from asgi import AsyncReadPath
+
+        application = AsyncReadPath(app)
+    except ImportError as e:
+        print(f"Skipping the asyncio read path: {e}")
+        return results
+
+    async def async_clients():
+        async def client():
+            for _ in range(args.requests):
+                for name, method, url, data, _explain in reads:
+                    await asgi_request(application, method, url, data)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        await application.engine.dispose()
+        return elapsed
+
+    results["asgi"] = total / asyncio.run(async_clients())
+    return results
+
+
+# ----------------------------------------------------------------------------#
+# Worker startup.
+# ----------------------------------------------------------------------------#
+# What a new gunicorn worker pays before serving its first request, measured
+# in a fresh interpreter each time so no module is already imported.
+
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+second = app.create_app()
+created = time.perf_counter()
+with app.app.app_context():
+    app.db.get_engine().connect().close()
+connected = time.perf_counter()
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+json.dump(
+    {
+        "import_ms": (imported - started) * 1000,
+        "create_app_ms": (created - imported) * 1000,
+        "engine_ms": (connected - created) * 1000,
+        "peak_rss_mib": peak / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    },
+    sys.stdout,
+)
+"""
+
+
+def measure_startup(args):
+    # Median of each startup figure over args.startup fresh interpreters.
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(
+            os.environ,
+            DATABASE_URL=args.database
+            or "sqlite:///" + os.path.join(tmpdir, "benchmark.db"),
+        )
+        runs = [
+            json.loads(
+                subprocess.run(
+                    [sys.executable, "-c", STARTUP_SCRIPT],
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                    env=env,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+            )
+            for _ in range(args.startup)
+        ]
+    return {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+
+# ----------------------------------------------------------------------------#
+# Datetime formatting.
+# ----------------------------------------------------------------------------#
+
+
+def reparsed_format(value):
+    # The formatting chain /shows used to run per show: the start time was
+    # stringified, parsed and formatted, then the template's datetime filter
+    # parsed that string and formatted it again.
+    import babel.dates
+    import dateutil.parser
+
+    medium = babel.dates.format_datetime(
+        dateutil.parser.parse(str(value)), "EE MM, dd, y h:mma", locale="en"
+    )
+    return babel.dates.format_datetime(
+        dateutil.parser.parse(medium), "EEEE MMMM, d, y 'at' h:mma", locale="en"
+    )
+
+
+def measure_formatting(args):
+    # Seconds to format args.format_datetimes start times, old and new; shows
+    # mostly start on the hour, so "repeated" draws from a year of hours.
+    from utils import format_datetime
+
+    rng = random.Random(args.seed)
+    now = datetime.now().replace(microsecond=0)
+    distinct = [
+        now + timedelta(minutes=minute)
+        for minute in rng.sample(range(-525600, 525600), args.format_datetimes)
+    ]
+    repeated = [
+        now.replace(minute=0, second=0) + timedelta(hours=rng.randint(-4380, 4380))
+        for _ in range(args.format_datetimes)
+    ]
+
+    def timed(format_one, values):
+        format_datetime.cache_clear()
+        started = time.perf_counter()
+        for value in values:
+            format_one(value)
+        return time.perf_counter() - started
+
+    def cached(value):
+        return format_datetime(value, "full")
+
+    return {
+        "re-parsed strings": timed(reparsed_format, distinct),
+        "format_datetime, distinct times": timed(cached, distinct),
+        "format_datetime, repeated times": timed(cached, repeated),
+    }
+
+
+# ----------------------------------------------------------------------------#
+# Runs.
+# ----------------------------------------------------------------------------#
+
+
+def run(args, venues, artists, shows):
+    database = args.database
+    tmpdir = None
+    if not database:
+        tmpdir = tempfile.TemporaryDirectory()
+        database = "sqlite:///" + os.path.join(tmpdir.name, "benchmark.db")
+
+    # app.py (and asgi.py) also build a default app at import; point it at the
+    # same database so importing them never needs the production drivers.
+    os.environ.setdefault("DATABASE_URL", database)
+    import config
+    import counters
+    import models
+    from app import create_app
+
+    db = models.db
+    app = create_app(
+        overrides={
+            "SQLALCHEMY_DATABASE_URI": database,
+            "SQLALCHEMY_ENGINE_OPTIONS": config.engine_options(database),
+            "CACHE_ENABLED": args.with_cache,
+            "WTF_CSRF_ENABLED": False,
+            "SLOW_QUERY_MS": None,
+        }
+    )
+
+    scaled = argparse.Namespace(
+        **{**vars(args), "venues": venues, "artists": artists, "shows": shows}
+    )
+    try:
+        with app.app_context():
+            if args.migrate:
+                import flask_migrate
+
+                flask_migrate.upgrade(directory="migrations")
+            else:
+                db.create_all()
+            started = time.perf_counter()
+            seed(db, models, venues, artists, shows, random.Random(args.seed))
+            counters.roll_show_counters()
+            print(
+                f"Seeded {venues} venues, {artists} artists, {shows} shows in {time.perf_counter() - started:.1f}s"
+            )
+        results = measure(app, db, scaled)
+        if args.concurrency:
+            for mode, rate in measure_throughput(app, scaled).items():
+                print(
+                    f"{mode}: {rate:.0f} requests/s with {args.concurrency} concurrent clients"
+                )
+    finally:
+        with app.app_context():
+            db.session.remove()
+            if args.database:
+                db.drop_all()
+            db.get_engine(app).dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+    return results
+
+
+def report(results):
+    print(f"{'route':<22}{'median ms':>11}{'p95 ms':>10}{'queries':>9}{'peak KiB':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<22}{result['median_ms']:>11.2f}{result['p95_ms']:>10.2f}"
+            f"{result['statements']:>9}{result['peak_kib']:>10.1f}"
+        )
+
+
+def volumes(args):
+    # The seeded data a baseline was recorded with; timings and statement
+    # counts are only comparable between runs over the same volumes.
+    return {"venues": args.venues, "artists": args.artists, "shows": args.shows}
+
+
+def compare(results, baseline, tolerance, min_slowdown_ms):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline["routes"].get(name)
+        if expected is None:
+            regressions.append(f"{name}: not in the baseline, re-save it")
+            continue
+        if result["statements"] > expected["statements"]:
+            regressions.append(
+                f"{name}: {result['statements']} statements, baseline {expected['statements']}"
+            )
+        allowed = max(
+            expected["median_ms"] * (1 + tolerance),
+            expected["median_ms"] + min_slowdown_ms,
+        )
+        if result["median_ms"] > allowed:
+            regressions.append(
+                f"{name}: median {result['median_ms']:.2f} ms, baseline {expected['median_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.startup:
+        startup = measure_startup(args)
+        print(f"Worker startup, median of {args.startup} interpreters:")
+        print(f"  import app (builds the default app)  {startup['import_ms']:8.1f} ms")
+        print(
+            f"  another create_app()                 {startup['create_app_ms']:8.1f} ms"
+        )
+        print(f"  first engine and connection          {startup['engine_ms']:8.1f} ms")
+        print(
+            f"  peak RSS                             {startup['peak_rss_mib']:8.1f} MiB"
+        )
+        return 0
+
+    if args.format_datetimes:
+        print(f"Formatting {args.format_datetimes} show start times:")
+        for name, seconds in measure_formatting(args).items():
+            print(f"  {name:<34}{seconds:8.2f} s")
+        return 0
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("volumes") != volumes(args):
+            print(
+                f"{args.baseline} was recorded with {baseline.get('volumes')}, "
+                f"not {volumes(args)}; re-run with those volumes or --save-baseline."
+            )
+            return 2
+
+    results = run(args, args.venues, args.artists, args.shows)
+    report(results)
+    failures = []
+
+    if args.explain:
+        for name, result in results.items():
+            for finding in result.get("unindexed_scans", []):
+                failures.append(
+                    f"{name}: unindexed Show scan in {finding['statement']} -> {finding['plan']}"
+                )
+
+    if args.check_scaling:
+        factor = args.check_scaling
+        scaled = run(
+            args, args.venues * factor, args.artists * factor, args.shows * factor
+        )
+        print(f"\nAt {factor}x data:")
+        report(scaled)
+        for name, result in scaled.items():
+            if result["statements"] != results[name]["statements"]:
+                failures.append(
+                    f"{name}: {results[name]['statements']} statements at 1x, {result['statements']} at {factor}x"
+                )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {"volumes": volumes(args), "routes": results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+    elif baseline is not None:
+        failures += compare(results, baseline, args.tolerance, args.min_slowdown_ms)
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
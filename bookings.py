@@ -0,0 +1,151 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import or_, select, union
+
+from models import db, Venue, Artist, Show, DEFAULT_SHOW_DURATION, MAX_SHOW_DURATION
+from utils import format_datetime
+
+# ----------------------------------------------------------------------------#
+# Double-booking detection.
+# ----------------------------------------------------------------------------#
+# A show holds its venue and its artist over [start_time, end_time); two shows
+# conflict when they share either and their intervals overlap. Since no show
+# runs longer than MAX_SHOW_DURATION, every show overlapping [start, end) starts
+# within (start - MAX_SHOW_DURATION, end), so a check is one bounded range scan
+# of the (venue_id, start_time) and (artist_id, start_time) indexes however long
+# the history. Postgres also enforces this with exclusion constraints (see
+# models.py), which catch bookings racing past the check.
+
+# (Show column, model) for each side of a booking.
+SIDES = (("venue_id", Venue), ("artist_id", Artist))
+
+
+def end_time_from_form(form):
+    # ShowForm's start_time plus its duration in minutes, or the default one.
+    if form.duration.data:
+        return form.start_time.data + timedelta(minutes=form.duration.data)
+    return form.start_time.data + DEFAULT_SHOW_DURATION
+
+
+def overlapping(field, key_id, start_time, end_time):
+    # Shows whose venue_id or artist_id (field) is key_id and that overlap
+    # [start_time, end_time).
+    return select(
+        Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.end_time
+    ).where(
+        getattr(Show, field) == key_id,
+        Show.start_time > start_time - MAX_SHOW_DURATION,
+        Show.start_time < end_time,
+        Show.end_time > start_time,
+    )
+
+
+def booking_conflicts(venue_id, artist_id, start_time, end_time):
+    # Existing shows that hold the venue or the artist during [start_time, end_time).
+    return db.session.execute(
+        union(
+            overlapping("venue_id", venue_id, start_time, end_time),
+            overlapping("artist_id", artist_id, start_time, end_time),
+        )
+    ).all()
+
+
+def conflict_errors(booking, conflicts):
+    # Form-style errors naming, for each side of booking, the earliest show it
+    # clashes with.
+    errors = {}
+    for show in sorted(conflicts, key=lambda show: show[0]):
+        start_time, end_time, show_booking = show
+        for field, model in SIDES:
+            if field not in errors and show_booking[field] == booking[field]:
+                errors[field] = [
+                    f"The {model.__tablename__.lower()} is already booked from "
+                    f"{format_datetime(start_time)} to {format_datetime(end_time)}."
+                ]
+    return errors
+
+
+def booking_errors(venue_id, artist_id, start_time, end_time):
+    # Form-style errors ({field: [messages]}) for a booking of an unknown venue
+    # or artist, or one overlapping an existing show; empty when it can be listed.
+    booking = {"venue_id": venue_id, "artist_id": artist_id}
+    errors = {}
+    for field, model in SIDES:
+        key_id = str(booking[field])
+        if not key_id.isdigit() or db.session.get(model, int(key_id)) is None:
+            errors[field] = [f"Unknown {model.__tablename__.lower()}."]
+        else:
+            booking[field] = int(key_id)
+    if errors:
+        return errors
+
+    conflicts = booking_conflicts(
+        booking["venue_id"], booking["artist_id"], start_time, end_time
+    )
+    return conflict_errors(
+        booking,
+        [(show.start_time, show.end_time, show._asdict()) for show in conflicts],
+    )
+
+
+class BookingIndex:
+    # In-memory interval index for checking many bookings at once (bulk
+    # imports): per venue and per artist, intervals sorted by start_time, so
+    # finding overlaps is a bisect over the same bounded window as the query
+    # above. Bookings added to it are checked against each other too.
+
+    def __init__(self):
+        # (field, id) -> ([start_time, ...], [(start_time, end_time, booking), ...])
+        self.intervals = defaultdict(lambda: ([], []))
+
+    @classmethod
+    def load(cls, bookings):
+        # Index of the existing shows that could overlap any of bookings, a
+        # list of dicts with venue_id, artist_id, start_time and end_time.
+        index = cls()
+        if not bookings:
+            return index
+        window_start = min(b["start_time"] for b in bookings) - MAX_SHOW_DURATION
+        window_end = max(b["end_time"] for b in bookings)
+        shows = db.session.execute(
+            select(Show.venue_id, Show.artist_id, Show.start_time, Show.end_time).where(
+                or_(
+                    Show.venue_id.in_({b["venue_id"] for b in bookings}),
+                    Show.artist_id.in_({b["artist_id"] for b in bookings}),
+                ),
+                Show.start_time > window_start,
+                Show.start_time < window_end,
+            )
+        )
+        for show in shows:
+            index.add(show._asdict())
+        return index
+
+    def add(self, booking):
+        start_time = booking["start_time"]
+        for field, _ in SIDES:
+            starts, intervals = self.intervals[field, booking[field]]
+            position = bisect_right(starts, start_time)
+            starts.insert(position, start_time)
+            intervals.insert(position, (start_time, booking["end_time"], booking))
+
+    def conflicts(self, booking):
+        # Indexed (start_time, end_time, booking) intervals overlapping booking.
+        start_time, end_time = booking["start_time"], booking["end_time"]
+        found = []
+        for field, _ in SIDES:
+            key = (field, booking[field])
+            if key not in self.intervals:
+                continue
+            starts, intervals = self.intervals[key]
+            low = bisect_right(starts, start_time - MAX_SHOW_DURATION)
+            high = bisect_left(starts, end_time)
+            found.extend(
+                interval for interval in intervals[low:high] if interval[1] > start_time
+            )
+        return found
+
+    def errors(self, booking):
+        return conflict_errors(booking, self.conflicts(booking))
@@ -0,0 +1,213 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+# ----------------------------------------------------------------------------#
+# Page data cache.
+# ----------------------------------------------------------------------------#
+# Read-heavy pages cache the data they pass to render_template under keys such
+# as "venues", "venue:3" or "shows:after=40". Templates are still rendered per
+# request because layouts/main.html embeds the session's CSRF token and flashed
+# messages. Write handlers invalidate keys (or key prefixes) after they commit.
+
+
+class MemoryBackend:
+    # In-process LRU bounded by max_entries, with a per-entry TTL.
+
+    shared = False
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemBackend:
+    # One pickle file per key in a shared directory: a local stand-in for a
+    # shared cache that every worker process on the host can see.
+
+    shared = True
+
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, quote(key, safe=""))
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at < time.time():
+            self._remove(self._path(key))
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        if len(os.listdir(self.directory)) >= self.max_entries:
+            self.clear()
+        # Write then rename so readers never see a partial file.
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((time.time() + ttl, value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        self._remove(self._path(key))
+
+    def delete_prefix(self, prefix):
+        for filename in os.listdir(self.directory):
+            if unquote(filename).startswith(prefix):
+                self._remove(os.path.join(self.directory, filename))
+
+    def clear(self):
+        for filename in os.listdir(self.directory):
+            self._remove(os.path.join(self.directory, filename))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class RedisBackend:
+    # Shared cache for multi-host deployments; needs the optional redis package.
+
+    shared = True
+
+    def __init__(self, url, namespace="fyyur:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def get(self, key):
+        value = self.client.get(self.namespace + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.setex(
+            self.namespace + key, ttl, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        )
+
+    def delete(self, key):
+        self.client.delete(self.namespace + key)
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=self.namespace + prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix("")
+
+
+class PageCache:
+    def __init__(self, backend, ttl=300, enabled=True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config):
+        backend_name = config.get("CACHE_BACKEND", "memory")
+        max_entries = config.get("CACHE_MAX_ENTRIES", 1024)
+        if backend_name == "memory":
+            backend = MemoryBackend(max_entries)
+        elif backend_name == "filesystem":
+            backend = FileSystemBackend(config["CACHE_DIR"], max_entries)
+        elif backend_name == "redis":
+            backend = RedisBackend(config["CACHE_REDIS_URL"])
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND {backend_name!r}")
+        return cls(
+            backend,
+            ttl=config.get("CACHE_TTL", 300),
+            enabled=config.get("CACHE_ENABLED", True),
+        )
+
+    def get(self, key):
+        # Returns None on a miss.
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        if self.enabled:
+            self.backend.set(key, value, ttl or self.ttl)
+
+    def invalidate(self, *keys):
+        # Drops each key and every key nested under it, e.g. "shows" also drops
+        # "shows:after=40" (but "venue:1" leaves "venue:10" alone).
+        for key in keys:
+            self.backend.delete(key)
+            self.backend.delete_prefix(key + ":")
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def invalidate_from_cli(config, *keys):
+    # CLI commands run in a process of their own, so they can only drop keys
+    # from a shared backend. A memory cache lives inside each web worker and
+    # its entries are left to expire after CACHE_TTL. Returns False when
+    # workers may still serve the old pages.
+    cache = PageCache.from_config(config)
+    if not cache.enabled:
+        return True
+    if not cache.backend.shared:
+        return False
+    cache.invalidate(*keys)
+    return True
@@ -0,0 +1,150 @@
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, func
+
+from cache import invalidate_from_cli
+from models import db, Venue, Artist, Show, ShowArchive, ShowCounterRoll
+
+# ----------------------------------------------------------------------------#
+# Materialized show counters.
+# ----------------------------------------------------------------------------#
+# Venue and Artist carry upcoming_shows_count and past_shows_count, split at
+# ShowCounterRoll.rolled_at rather than at the current time. Adding shows bumps
+# the counters in the same transaction; flask roll-show-counters, run from cron
+# or a scheduler every few minutes, moves the shows that have started since the
+# last roll from upcoming to past and advances rolled_at. Listings are therefore
+# exact as of the last roll.
+#
+# Both paths lock the ShowCounterRoll row (shared for writers, exclusive for the
+# roll), so a show is never counted against a rolled_at it did not see.
+
+COUNTED_MODELS = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+
+
+def rolled_at(for_update=False):
+    query = db.session.query(ShowCounterRoll.rolled_at)
+    if for_update:
+        query = query.with_for_update()
+    else:
+        query = query.with_for_update(read=True)
+    return query.scalar()
+
+
+def adjust_counts(model, deltas):
+    # deltas maps id -> (upcoming delta, past delta); one executemany UPDATE.
+    if not deltas:
+        return
+    table = model.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == bindparam("counted_id"))
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count
+            + bindparam("upcoming_delta"),
+            past_shows_count=table.c.past_shows_count + bindparam("past_delta"),
+        ),
+        [
+            {"counted_id": id, "upcoming_delta": upcoming, "past_delta": past}
+            for id, (upcoming, past) in deltas.items()
+        ],
+    )
+
+
+def count_new_shows(shows):
+    # Call with the (venue_id, artist_id, start_time) of shows added in the
+    # current transaction, before committing it.
+    split = rolled_at()
+    if split is None:
+        # Counters not initialized yet; the first roll recounts everything.
+        return
+
+    for position in (0, 1):
+        upcoming, past = Counter(), Counter()
+        for show in shows:
+            if show[2] > split:
+                upcoming[int(show[position])] += 1
+            else:
+                past[int(show[position])] += 1
+        deltas = {id: (upcoming[id], past[id]) for id in upcoming.keys() | past.keys()}
+        adjust_counts(COUNTED_MODELS[position][0], deltas)
+
+
+def recount(now):
+    # Rebuilds every counter from Show and ShowArchive in one UPDATE per table.
+    for model, key in COUNTED_MODELS:
+        shows = db.session.query(func.count(Show.id)).filter(key == model.id)
+        archived = db.session.query(func.count(ShowArchive.id)).filter(
+            getattr(ShowArchive, key.key) == model.id
+        )
+        db.session.query(model).update(
+            {
+                model.upcoming_shows_count: shows.filter(
+                    Show.start_time > now
+                ).scalar_subquery(),
+                model.past_shows_count: shows.filter(
+                    Show.start_time <= now
+                ).scalar_subquery()
+                + archived.scalar_subquery(),
+            },
+            synchronize_session=False,
+        )
+
+
+def roll_show_counters(now=None, full=False):
+    # Returns the number of shows moved from upcoming to past, or None after a
+    # full recount.
+    now = now or datetime.now()
+    state = db.session.query(ShowCounterRoll).with_for_update().first()
+
+    if state is None or full:
+        recount(now)
+        if state is None:
+            state = ShowCounterRoll(id=1, rolled_at=now)
+            db.session.add(state)
+        state.rolled_at = now
+        db.session.commit()
+        return None
+
+    moved = 0
+    if now > state.rolled_at:
+        for model, key in COUNTED_MODELS:
+            started = (
+                db.session.query(key, func.count(Show.id))
+                .filter(Show.start_time > state.rolled_at, Show.start_time <= now)
+                .group_by(key)
+                .all()
+            )
+            adjust_counts(model, {id: (-count, count) for id, count in started})
+            if model is Venue:
+                moved = sum(count for _, count in started)
+        state.rolled_at = now
+    db.session.commit()
+    return moved
+
+
+@click.command("roll-show-counters")
+@click.option(
+    "--recount",
+    is_flag=True,
+    help="Rebuild every counter from the Show table instead of rolling forward.",
+)
+@with_appcontext
+def roll_show_counters_command(recount):
+    """Move started shows from the upcoming to the past counters."""
+    moved = roll_show_counters(full=recount)
+
+    if moved is None:
+        click.echo("Show counters recounted.")
+    else:
+        click.echo(f"{moved} shows rolled from upcoming to past.")
+
+    # The venue listing caches upcoming counts.
+    if moved != 0 and not invalidate_from_cli(current_app.config, "venues"):
+        click.echo(
+            "The web workers' memory caches may show the old counts for up to "
+            f"{current_app.config['CACHE_TTL']} seconds."
+        )
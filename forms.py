@@ -1,13 +1,100 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from flask_wtf import Form
 from wtforms import (
     StringField,
     SelectField,
     SelectMultipleField,
+    DateField,
     DateTimeField,
     BooleanField,
+    IntegerField,
 )
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms.validators import (
+    DataRequired,
+    AnyOf,
+    URL,
+    NumberRange,
+    Optional,
+    ValidationError,
+)
+
+from models import DEFAULT_SHOW_DURATION, MAX_SHOW_DURATION
+
+STATE_CHOICES = [
+    ("AL", "AL"),
+    ("AK", "AK"),
+    ("AZ", "AZ"),
+    ("AR", "AR"),
+    ("CA", "CA"),
+    ("CO", "CO"),
+    ("CT", "CT"),
+    ("DE", "DE"),
+    ("DC", "DC"),
+    ("FL", "FL"),
+    ("GA", "GA"),
+    ("HI", "HI"),
+    ("ID", "ID"),
+    ("IL", "IL"),
+    ("IN", "IN"),
+    ("IA", "IA"),
+    ("KS", "KS"),
+    ("KY", "KY"),
+    ("LA", "LA"),
+    ("ME", "ME"),
+    ("MT", "MT"),
+    ("NE", "NE"),
+    ("NV", "NV"),
+    ("NH", "NH"),
+    ("NJ", "NJ"),
+    ("NM", "NM"),
+    ("NY", "NY"),
+    ("NC", "NC"),
+    ("ND", "ND"),
+    ("OH", "OH"),
+    ("OK", "OK"),
+    ("OR", "OR"),
+    ("MD", "MD"),
+    ("MA", "MA"),
+    ("MI", "MI"),
+    ("MN", "MN"),
+    ("MS", "MS"),
+    ("MO", "MO"),
+    ("PA", "PA"),
+    ("RI", "RI"),
+    ("SC", "SC"),
+    ("SD", "SD"),
+    ("TN", "TN"),
+    ("TX", "TX"),
+    ("UT", "UT"),
+    ("VT", "VT"),
+    ("VA", "VA"),
+    ("WA", "WA"),
+    ("WV", "WV"),
+    ("WI", "WI"),
+    ("WY", "WY"),
+]
+
+GENRE_CHOICES = [
+    ("Alternative", "Alternative"),
+    ("Blues", "Blues"),
+    ("Classical", "Classical"),
+    ("Country", "Country"),
+    ("Electronic", "Electronic"),
+    ("Folk", "Folk"),
+    ("Funk", "Funk"),
+    ("Hip-Hop", "Hip-Hop"),
+    ("Heavy Metal", "Heavy Metal"),
+    ("Instrumental", "Instrumental"),
+    ("Jazz", "Jazz"),
+    ("Musical Theatre", "Musical Theatre"),
+    ("Pop", "Pop"),
+    ("Punk", "Punk"),
+    ("R&B", "R&B"),
+    ("Reggae", "Reggae"),
+    ("Rock n Roll", "Rock n Roll"),
+    ("Soul", "Soul"),
+    ("Other", "Other"),
+]
 
 
 class ShowForm(Form):
@@ -16,6 +103,42 @@ class ShowForm(Form):
     start_time = DateTimeField(
         "start_time", validators=[DataRequired()], default=datetime.today()
     )
+    # Minutes; left blank, the show gets DEFAULT_SHOW_DURATION.
+    duration = IntegerField(
+        "duration",
+        validators=[
+            Optional(),
+            NumberRange(min=1, max=MAX_SHOW_DURATION // timedelta(minutes=1)),
+        ],
+        default=DEFAULT_SHOW_DURATION // timedelta(minutes=1),
+    )
+
+
+class CalendarForm(Form):
+    # Filters of the show calendar, read from the query string; all optional.
+    start = DateField("start", validators=[Optional()])
+    end = DateField("end", validators=[Optional()])
+    city = StringField("city")
+    state = SelectField(
+        "state", choices=[("", "Any state")] + STATE_CHOICES, default=""
+    )
+    genre = SelectField(
+        "genre", choices=[("", "Any genre")] + GENRE_CHOICES, default=""
+    )
+
+    # calendar_range() adds days to both dates (up to CALENDAR_DAYS after the
+    # start), so they are kept a year clear of date.max.
+    LAST_DATE = date(date.max.year - 1, 12, 31)
+
+    def validate_start(self, field):
+        if field.data and field.data > self.LAST_DATE:
+            raise ValidationError(f"Dates must be on or before {self.LAST_DATE}.")
+
+    def validate_end(self, field):
+        if field.data and field.data > self.LAST_DATE:
+            raise ValidationError(f"Dates must be on or before {self.LAST_DATE}.")
+        if field.data and self.start.data and field.data < self.start.data:
+            raise ValidationError("The end date is before the start date.")
 
 
 class VenueForm(Form):
@@ -24,59 +147,7 @@ class VenueForm(Form):
     state = SelectField(
         "state",
         validators=[DataRequired()],
-        choices=[
-            ("AL", "AL"),
-            ("AK", "AK"),
-            ("AZ", "AZ"),
-            ("AR", "AR"),
-            ("CA", "CA"),
-            ("CO", "CO"),
-            ("CT", "CT"),
-            ("DE", "DE"),
-            ("DC", "DC"),
-            ("FL", "FL"),
-            ("GA", "GA"),
-            ("HI", "HI"),
-            ("ID", "ID"),
-            ("IL", "IL"),
-            ("IN", "IN"),
-            ("IA", "IA"),
-            ("KS", "KS"),
-            ("KY", "KY"),
-            ("LA", "LA"),
-            ("ME", "ME"),
-            ("MT", "MT"),
-            ("NE", "NE"),
-            ("NV", "NV"),
-            ("NH", "NH"),
-            ("NJ", "NJ"),
-            ("NM", "NM"),
-            ("NY", "NY"),
-            ("NC", "NC"),
-            ("ND", "ND"),
-            ("OH", "OH"),
-            ("OK", "OK"),
-            ("OR", "OR"),
-            ("MD", "MD"),
-            ("MA", "MA"),
-            ("MI", "MI"),
-            ("MN", "MN"),
-            ("MS", "MS"),
-            ("MO", "MO"),
-            ("PA", "PA"),
-            ("RI", "RI"),
-            ("SC", "SC"),
-            ("SD", "SD"),
-            ("TN", "TN"),
-            ("TX", "TX"),
-            ("UT", "UT"),
-            ("VT", "VT"),
-            ("VA", "VA"),
-            ("WA", "WA"),
-            ("WV", "WV"),
-            ("WI", "WI"),
-            ("WY", "WY"),
-        ],
+        choices=STATE_CHOICES,
     )
     address = StringField("address")
     phone = StringField("phone")
@@ -85,27 +156,7 @@ class VenueForm(Form):
         # TODO implement enum restriction
         "genres",
         validators=[DataRequired()],
-        choices=[
-            ("Alternative", "Alternative"),
-            ("Blues", "Blues"),
-            ("Classical", "Classical"),
-            ("Country", "Country"),
-            ("Electronic", "Electronic"),
-            ("Folk", "Folk"),
-            ("Funk", "Funk"),
-            ("Hip-Hop", "Hip-Hop"),
-            ("Heavy Metal", "Heavy Metal"),
-            ("Instrumental", "Instrumental"),
-            ("Jazz", "Jazz"),
-            ("Musical Theatre", "Musical Theatre"),
-            ("Pop", "Pop"),
-            ("Punk", "Punk"),
-            ("R&B", "R&B"),
-            ("Reggae", "Reggae"),
-            ("Rock n Roll", "Rock n Roll"),
-            ("Soul", "Soul"),
-            ("Other", "Other"),
-        ],
+        choices=GENRE_CHOICES,
     )
     facebook_link = StringField("facebook_link", validators=[URL()])
     website_link = StringField("website_link")
@@ -121,59 +172,7 @@ class ArtistForm(Form):
     state = SelectField(
         "state",
         validators=[DataRequired()],
-        choices=[
-            ("AL", "AL"),
-            ("AK", "AK"),
-            ("AZ", "AZ"),
-            ("AR", "AR"),
-            ("CA", "CA"),
-            ("CO", "CO"),
-            ("CT", "CT"),
-            ("DE", "DE"),
-            ("DC", "DC"),
-            ("FL", "FL"),
-            ("GA", "GA"),
-            ("HI", "HI"),
-            ("ID", "ID"),
-            ("IL", "IL"),
-            ("IN", "IN"),
-            ("IA", "IA"),
-            ("KS", "KS"),
-            ("KY", "KY"),
-            ("LA", "LA"),
-            ("ME", "ME"),
-            ("MT", "MT"),
-            ("NE", "NE"),
-            ("NV", "NV"),
-            ("NH", "NH"),
-            ("NJ", "NJ"),
-            ("NM", "NM"),
-            ("NY", "NY"),
-            ("NC", "NC"),
-            ("ND", "ND"),
-            ("OH", "OH"),
-            ("OK", "OK"),
-            ("OR", "OR"),
-            ("MD", "MD"),
-            ("MA", "MA"),
-            ("MI", "MI"),
-            ("MN", "MN"),
-            ("MS", "MS"),
-            ("MO", "MO"),
-            ("PA", "PA"),
-            ("RI", "RI"),
-            ("SC", "SC"),
-            ("SD", "SD"),
-            ("TN", "TN"),
-            ("TX", "TX"),
-            ("UT", "UT"),
-            ("VT", "VT"),
-            ("VA", "VA"),
-            ("WA", "WA"),
-            ("WV", "WV"),
-            ("WI", "WI"),
-            ("WY", "WY"),
-        ],
+        choices=STATE_CHOICES,
     )
     phone = StringField(
         # TODO implement validation logic for state
@@ -183,27 +182,7 @@ class ArtistForm(Form):
     genres = SelectMultipleField(
         "genres",
         validators=[DataRequired()],
-        choices=[
-            ("Alternative", "Alternative"),
-            ("Blues", "Blues"),
-            ("Classical", "Classical"),
-            ("Country", "Country"),
-            ("Electronic", "Electronic"),
-            ("Folk", "Folk"),
-            ("Funk", "Funk"),
-            ("Hip-Hop", "Hip-Hop"),
-            ("Heavy Metal", "Heavy Metal"),
-            ("Instrumental", "Instrumental"),
-            ("Jazz", "Jazz"),
-            ("Musical Theatre", "Musical Theatre"),
-            ("Pop", "Pop"),
-            ("Punk", "Punk"),
-            ("R&B", "R&B"),
-            ("Reggae", "Reggae"),
-            ("Rock n Roll", "Rock n Roll"),
-            ("Soul", "Soul"),
-            ("Other", "Other"),
-        ],
+        choices=GENRE_CHOICES,
     )
     facebook_link = StringField(
         # TODO implement enum restriction
@@ -0,0 +1,272 @@
+import csv
+import json
+import re
+import time
+from functools import partial
+from itertools import islice
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from werkzeug.datastructures import MultiDict
+from wtforms import BooleanField
+
+from bookings import BookingIndex, end_time_from_form
+from cache import invalidate_from_cli
+from counters import count_new_shows
+from forms import ArtistForm, ShowForm, VenueForm
+from models import db, Venue, Artist, Show
+
+# ----------------------------------------------------------------------------#
+# Bulk import.
+# ----------------------------------------------------------------------------#
+# flask import-data {venues,artists,shows} PATH streams a CSV or NDJSON file,
+# validates each row with the same form the create handlers use, and writes
+# accepted rows in batches, one transaction per batch.
+
+
+def read_rows(path):
+    # NDJSON when the extension says so, CSV with a header row otherwise.
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+# Spellings of false in CSV cells; BooleanField itself only takes "false" and "".
+FALSE_VALUES = {"", "false", "f", "no", "n", "off", "0"}
+
+
+def is_boolean_field(form_class, key):
+    return getattr(getattr(form_class, key, None), "field_class", None) is BooleanField
+
+
+def validate_row(form_class, row):
+    # Returns (form, None) when the row passes the form's validators, or
+    # (None, errors) otherwise. CSV genres are a comma-separated cell.
+    formdata = MultiDict()
+    for key, value in row.items():
+        if key == "genres" and isinstance(value, str):
+            value = [genre.strip() for genre in value.split(",") if genre.strip()]
+        if is_boolean_field(form_class, key) and value is not None:
+            # JSON true/false and CSV spellings become what a checkbox posts.
+            if isinstance(value, str):
+                value = value.strip().lower() not in FALSE_VALUES
+            value = "y" if value else ""
+        if isinstance(value, list):
+            for item in value:
+                formdata.add(key, item)
+        elif value is not None:
+            formdata.add(key, str(value))
+
+    form = form_class(formdata=formdata, meta={"csrf": False})
+    if form.validate():
+        return form, None
+    return None, form.errors
+
+
+def clean(value):
+    return (value or "").strip()
+
+
+def venue_from_form(form):
+    return Venue(
+        name=clean(form.name.data),
+        genres=form.genres.data,
+        city=clean(form.city.data),
+        state=clean(form.state.data),
+        phone=re.sub(r"\D", "", clean(form.phone.data)),
+        address=clean(form.address.data),
+        website=clean(form.website_link.data),
+        facebook_link=clean(form.facebook_link.data),
+        seeking_talent=form.seeking_talent.data,
+        seeking_description=clean(form.seeking_description.data),
+        image_link=clean(form.image_link.data),
+    )
+
+
+def artist_from_form(form):
+    return Artist(
+        name=clean(form.name.data),
+        genres=form.genres.data,
+        city=clean(form.city.data),
+        state=clean(form.state.data),
+        phone=re.sub(r"\D", "", clean(form.phone.data)),
+        website=clean(form.website_link.data),
+        facebook_link=clean(form.facebook_link.data),
+        seeking_venue=form.seeking_venue.data,
+        seeking_description=clean(form.seeking_description.data),
+        image_link=clean(form.image_link.data),
+    )
+
+
+def import_entities(batch, form_class, build):
+    # Venues and artists carry genre rows keyed on the generated id, so they
+    # go through the ORM; one flush per batch.
+    accepted, rejected = [], []
+    for line_number, row in batch:
+        form, errors = validate_row(form_class, row)
+        if errors:
+            rejected.append((line_number, row, errors))
+        else:
+            accepted.append(build(form))
+    db.session.add_all(accepted)
+    db.session.commit()
+    return len(accepted), rejected
+
+
+def resolve_ids(model, rows, id_key, name_key):
+    # Maps every id and name referenced by the batch to an existing primary key
+    # with two IN queries, instead of one lookup per row.
+    ids = {row.get(id_key) for row in rows if row.get(id_key)}
+    names = {row.get(name_key) for row in rows if row.get(name_key)}
+
+    by_id = {}
+    numeric_ids = [int(value) for value in ids if str(value).isdigit()]
+    if numeric_ids:
+        for (found_id,) in db.session.query(model.id).filter(model.id.in_(numeric_ids)):
+            by_id[str(found_id)] = found_id
+
+    by_name = {}
+    if names:
+        for found_id, name in (
+            db.session.query(model.id, model.name)
+            .filter(model.name.in_(names))
+            .order_by(model.id)
+        ):
+            by_name.setdefault(name, found_id)
+
+    def resolve(row):
+        if row.get(id_key):
+            return by_id.get(str(row[id_key]))
+        return by_name.get(row.get(name_key))
+
+    return resolve
+
+
+def import_shows(batch):
+    # Shows are the bulk of any schedule: validated rows go out as a single
+    # executemany INSERT per batch. Rows that would double-book a venue or an
+    # artist, against existing shows or earlier rows, are rejected; one query
+    # loads the existing bookings the batch could overlap.
+    rows = [row for _, row in batch]
+    resolve_venue = resolve_ids(Venue, rows, "venue_id", "venue_name")
+    resolve_artist = resolve_ids(Artist, rows, "artist_id", "artist_name")
+
+    candidates, rejected = [], []
+    for line_number, row in batch:
+        form, errors = validate_row(ShowForm, row)
+        if errors:
+            rejected.append((line_number, row, errors))
+            continue
+        venue_id = resolve_venue(row)
+        artist_id = resolve_artist(row)
+        if venue_id is None or artist_id is None:
+            errors = {}
+            if venue_id is None:
+                errors["venue_id"] = ["Unknown venue."]
+            if artist_id is None:
+                errors["artist_id"] = ["Unknown artist."]
+            rejected.append((line_number, row, errors))
+            continue
+        candidates.append(
+            (
+                line_number,
+                row,
+                {
+                    "venue_id": venue_id,
+                    "artist_id": artist_id,
+                    "start_time": form.start_time.data,
+                    "end_time": end_time_from_form(form),
+                },
+            )
+        )
+
+    bookings = BookingIndex.load([show for _, _, show in candidates])
+    accepted = []
+    for line_number, row, show in candidates:
+        errors = bookings.errors(show)
+        if errors:
+            rejected.append((line_number, row, errors))
+        else:
+            bookings.add(show)
+            accepted.append(show)
+
+    if accepted:
+        db.session.execute(Show.__table__.insert(), accepted)
+        count_new_shows(
+            [(row["venue_id"], row["artist_id"], row["start_time"]) for row in accepted]
+        )
+    db.session.commit()
+    return len(accepted), sorted(rejected, key=lambda reject: reject[0])
+
+
+@click.command("import-data")
+@click.argument("kind", type=click.Choice(["venues", "artists", "shows"]))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", default=1000, show_default=True)
+@click.option(
+    "--rejects",
+    type=click.Path(dir_okay=False),
+    help="Write rejected rows and their errors to this NDJSON file.",
+)
+@with_appcontext
+def import_data(kind, path, batch_size, rejects):
+    """Bulk-load venues, artists or shows from a CSV or NDJSON file."""
+    if kind == "venues":
+        import_batch = partial(
+            import_entities, form_class=VenueForm, build=venue_from_form
+        )
+    elif kind == "artists":
+        import_batch = partial(
+            import_entities, form_class=ArtistForm, build=artist_from_form
+        )
+    else:
+        import_batch = import_shows
+
+    rejects_file = open(rejects, "w", encoding="utf-8") if rejects else None
+    imported = rejected_count = 0
+    started = time.perf_counter()
+
+    # CSV line 1 is the header, so data rows are numbered from 2 to match editors.
+    first_line = 1 if path.endswith((".ndjson", ".jsonl")) else 2
+    rows = enumerate(read_rows(path), start=first_line)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            accepted, rejected = import_batch(batch)
+            imported += accepted
+            rejected_count += len(rejected)
+            for line_number, row, errors in rejected:
+                click.echo(f"line {line_number}: {errors}", err=True)
+                if rejects_file:
+                    rejects_file.write(
+                        json.dumps({"line": line_number, "row": row, "errors": errors})
+                        + "\n"
+                    )
+            elapsed = time.perf_counter() - started
+            click.echo(
+                f"{imported} {kind} imported, {rejected_count} rejected "
+                f"({imported / elapsed:.0f} rows/s)"
+            )
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Done: {imported} {kind} imported, {rejected_count} rejected in "
+        f"{elapsed:.1f}s ({imported / elapsed:.0f} rows/s)"
+    )
+
+    stale_keys = ("venues", "artists", "shows", "venue", "artist")
+    if imported and not invalidate_from_cli(current_app.config, *stale_keys):
+        click.echo(
+            "The web workers' memory caches may serve pre-import pages for up to "
+            f"{current_app.config['CACHE_TTL']} seconds."
+        )
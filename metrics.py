@@ -0,0 +1,153 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ----------------------------------------------------------------------------#
+# Request and SQL metrics.
+# ----------------------------------------------------------------------------#
+# SQLAlchemy cursor events count statements and time spent in the database for
+# the current request; per-endpoint histograms are exported at /metrics in the
+# Prometheus text format. Figures are per worker process.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.statements = {}
+        self.sql_seconds = {}
+        # name -> (metric type, help text, callable returning the current value)
+        self.values = {}
+
+    def init_app(self, app):
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule("/metrics", "metrics", self.render)
+
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    def add_value(self, name, help_text, value, kind="gauge"):
+        # Exports value() under name, for figures tracked elsewhere.
+        self.values[name] = (kind, help_text, value)
+
+    def _start_request(self):
+        g.request_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    def _finish_request(self, response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        # Streamed bodies are generated (and queried) after this hook, so the
+        # request is observed once the server closes the response.
+        request_globals = g._get_current_object()
+        endpoint = request.endpoint or "unmatched"
+        response.call_on_close(
+            lambda: self._observe(endpoint, started, request_globals)
+        )
+        return response
+
+    def _observe(self, endpoint, started, request_globals):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if endpoint not in self.latency:
+                self.latency[endpoint] = Histogram(LATENCY_BUCKETS)
+                self.statements[endpoint] = Histogram(STATEMENT_BUCKETS)
+                self.sql_seconds[endpoint] = 0.0
+            self.latency[endpoint].observe(elapsed)
+            self.statements[endpoint].observe(request_globals.sql_statements)
+            self.sql_seconds[endpoint] += request_globals.sql_seconds
+
+    def render(self):
+        lines = [
+            "# HELP fyyur_request_duration_seconds Request latency by endpoint.",
+            "# TYPE fyyur_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for endpoint, histogram in sorted(self.latency.items()):
+                lines += histogram.render(
+                    "fyyur_request_duration_seconds", f'endpoint="{endpoint}"'
+                )
+
+            lines += [
+                "# HELP fyyur_request_sql_statements SQL statements per request by endpoint.",
+                "# TYPE fyyur_request_sql_statements histogram",
+            ]
+            for endpoint, histogram in sorted(self.statements.items()):
+                lines += histogram.render(
+                    "fyyur_request_sql_statements", f'endpoint="{endpoint}"'
+                )
+
+            lines += [
+                "# HELP fyyur_request_sql_seconds_total Time spent executing SQL by endpoint.",
+                "# TYPE fyyur_request_sql_seconds_total counter",
+            ]
+            for endpoint, seconds in sorted(self.sql_seconds.items()):
+                lines.append(
+                    f'fyyur_request_sql_seconds_total{{endpoint="{endpoint}"}} {seconds}'
+                )
+
+        for name, (kind, help_text, value) in sorted(self.values.items()):
+            lines += [
+                f"# HELP {name} {help_text}",
+                f"# TYPE {name} {kind}",
+                f"{name} {value()}",
+            ]
+
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_started
+    if not has_app_context():
+        return
+
+    if "sql_statements" in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+    threshold = current_app.config.get("SLOW_QUERY_MS")
+    if threshold is not None and elapsed * 1000 >= threshold:
+        current_app.logger.warning(
+            "Slow query (%.1f ms): %s; parameters: %r",
+            elapsed * 1000,
+            statement,
+            parameters,
+        )
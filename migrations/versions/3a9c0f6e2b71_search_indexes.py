@@ -0,0 +1,54 @@
+"""trigram search indexes on Venue and Artist
+
+Revision ID: 3a9c0f6e2b71
+Revises: 16ea36c79300
+Create Date: 2026-10-17 09:12:44.510231
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3a9c0f6e2b71"
+down_revision = "16ea36c79300"
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs searched with ILIKE '%term%' by search_ranked()
+SEARCH_COLUMNS = [
+    ("Venue", "name"),
+    ("Venue", "city"),
+    ("Venue", "state"),
+    ("Artist", "name"),
+    ("Artist", "city"),
+    ("Artist", "state"),
+]
+
+
+def index_name(table, column):
+    return f"ix_{table.lower()}_{column}_trgm"
+
+
+def upgrade():
+    # GIN trigram indexes let Postgres answer ILIKE '%term%' without a sequential scan.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column in SEARCH_COLUMNS:
+        op.create_index(
+            index_name(table, column),
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table, column in SEARCH_COLUMNS:
+        op.drop_index(index_name(table, column), table_name=table)
@@ -0,0 +1,124 @@
+"""move pickled genres into VenueGenre and ArtistGenre tables
+
+Revision ID: 8d2e4b7c1f05
+Revises: 3a9c0f6e2b71
+Create Date: 2026-10-17 10:03:27.884912
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8d2e4b7c1f05"
+down_revision = "3a9c0f6e2b71"
+branch_labels = None
+depends_on = None
+
+# Rows read and written per round-trip while converting existing data
+BATCH_SIZE = 1000
+
+# (owner table, genre table, foreign key column)
+GENRE_TABLES = [
+    ("Venue", "VenueGenre", "venue_id"),
+    ("Artist", "ArtistGenre", "artist_id"),
+]
+
+
+def pickled_table(name):
+    return sa.table(
+        name, sa.column("id", sa.Integer), sa.column("genres", sa.PickleType)
+    )
+
+
+def genre_table(name, fk):
+    return sa.table(name, sa.column(fk, sa.Integer), sa.column("genre", sa.String))
+
+
+def upgrade():
+    for owner, name, fk in GENRE_TABLES:
+        op.create_table(
+            name,
+            sa.Column(fk, sa.Integer(), nullable=False),
+            sa.Column("genre", sa.String(length=120), nullable=False),
+            sa.ForeignKeyConstraint([fk], [f"{owner}.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint(fk, "genre"),
+        )
+        op.create_index(f"ix_{owner.lower()}_genre_genre", name, ["genre", fk])
+
+    bind = op.get_bind()
+    for owner, name, fk in GENRE_TABLES:
+        source = pickled_table(owner)
+        target = genre_table(name, fk)
+
+        # Walk the owner table in primary key order so each batch is one indexed range read.
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(source.c.id, source.c.genres)
+                .where(source.c.id > last_id)
+                .order_by(source.c.id)
+                .limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+
+            values = [
+                {fk: row.id, "genre": genre}
+                for row in rows
+                for genre in dict.fromkeys(row.genres or [])
+            ]
+            if values:
+                bind.execute(target.insert(), values)
+            last_id = rows[-1].id
+
+        with op.batch_alter_table(owner) as batch_op:
+            batch_op.drop_column("genres")
+
+
+def downgrade():
+    bind = op.get_bind()
+    for owner, name, fk in GENRE_TABLES:
+        op.add_column(owner, sa.Column("genres", sa.PickleType(), nullable=True))
+
+        source = genre_table(name, fk)
+        target = pickled_table(owner)
+
+        last_id = 0
+        while True:
+            ids = (
+                bind.execute(
+                    sa.select(target.c.id)
+                    .where(target.c.id > last_id)
+                    .order_by(target.c.id)
+                    .limit(BATCH_SIZE)
+                )
+                .scalars()
+                .all()
+            )
+            if not ids:
+                break
+
+            genres = {owner_id: [] for owner_id in ids}
+            for owner_id, genre in bind.execute(
+                sa.select(source.c[fk], source.c.genre)
+                .where(source.c[fk].in_(ids))
+                .order_by(source.c[fk], source.c.genre)
+            ):
+                genres[owner_id].append(genre)
+
+            for owner_id, owner_genres in genres.items():
+                bind.execute(
+                    target.update()
+                    .where(target.c.id == owner_id)
+                    .values(genres=owner_genres)
+                )
+            last_id = ids[-1]
+
+        with op.batch_alter_table(owner) as batch_op:
+            batch_op.alter_column(
+                "genres", existing_type=sa.PickleType(), nullable=False
+            )
+
+        op.drop_index(f"ix_{owner.lower()}_genre_genre", table_name=name)
+        op.drop_table(name)
@@ -0,0 +1,91 @@
+"""end_time on Show, with overlap constraints per venue and artist
+
+Revision ID: a3c9e61f2d74
+Revises: f7a1c6e0b482
+Create Date: 2026-10-17 15:21:07.318845
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a3c9e61f2d74"
+down_revision = "f7a1c6e0b482"
+branch_labels = None
+depends_on = None
+
+DEFAULT_DURATION_MINUTES = 120
+
+# Constraint name -> column that may not be double-booked.
+EXCLUSION_CONSTRAINTS = {
+    "ex_show_venue_overlap": "venue_id",
+    "ex_show_artist_overlap": "artist_id",
+}
+
+
+def plus_minutes(dialect, column, minutes):
+    if dialect == "postgresql":
+        return column + sa.literal_column(f"interval '{minutes} minutes'", sa.Interval)
+    # SQLite compares datetimes as text, so keep SQLAlchemy's storage format.
+    return sa.func.strftime("%Y-%m-%d %H:%M:%f000", column, f"+{minutes} minutes")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    show = sa.table(
+        "Show",
+        sa.column("id", sa.Integer),
+        sa.column("venue_id", sa.Integer),
+        sa.column("artist_id", sa.Integer),
+        sa.column("start_time", sa.DateTime),
+        sa.column("end_time", sa.DateTime),
+    )
+
+    # Existing shows get the default duration, cut short where the venue or
+    # artist has a later show starting sooner, so history never overlaps.
+    # Shows sharing a start time end up empty (end_time == start_time).
+    op.add_column("Show", sa.Column("end_time", sa.DateTime(), nullable=True))
+    op.execute(
+        show.update().values(
+            end_time=plus_minutes(dialect, show.c.start_time, DEFAULT_DURATION_MINUTES)
+        )
+    )
+    for column in EXCLUSION_CONSTRAINTS.values():
+        later = show.alias("later")
+        next_start = (
+            sa.select(sa.func.min(later.c.start_time))
+            .where(
+                later.c[column] == show.c[column],
+                later.c.start_time >= show.c.start_time,
+                later.c.id != show.c.id,
+            )
+            .scalar_subquery()
+        )
+        op.execute(
+            show.update()
+            .where(next_start < show.c.end_time)
+            .values(end_time=next_start)
+        )
+
+    with op.batch_alter_table("Show") as batch_op:
+        batch_op.alter_column("end_time", existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_check_constraint("ck_show_end_time", "end_time >= start_time")
+
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        for name, column in EXCLUSION_CONSTRAINTS.items():
+            op.execute(
+                f'ALTER TABLE "Show" ADD CONSTRAINT {name} EXCLUDE USING gist '
+                f"({column} WITH =, tsrange(start_time, end_time) WITH &&)"
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        for name in EXCLUSION_CONSTRAINTS:
+            op.drop_constraint(name, "Show")
+
+    with op.batch_alter_table("Show") as batch_op:
+        batch_op.drop_constraint("ck_show_end_time", type_="check")
+        batch_op.drop_column("end_time")
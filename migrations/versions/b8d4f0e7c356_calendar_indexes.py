@@ -0,0 +1,36 @@
+"""calendar indexes: Venue (state, city) and a BRIN index on Show.start_time
+
+Revision ID: b8d4f0e7c356
+Revises: a3c9e61f2d74
+Create Date: 2026-10-17 16:48:52.904116
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b8d4f0e7c356"
+down_revision = "a3c9e61f2d74"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_venue_state_city", "Venue", ["state", "city"])
+
+    # Shows are mostly inserted in start_time order, so a BRIN index (one
+    # min/max summary per block range) covers years of history in a few pages
+    # and lets wide calendar ranges skip every block outside them. The btree
+    # ix_show_start_time stays for ordered, paginated scans.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.create_index(
+        "ix_show_start_time_brin", "Show", ["start_time"], postgresql_using="brin"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_show_start_time_brin", table_name="Show")
+    op.drop_index("ix_venue_state_city", table_name="Venue")
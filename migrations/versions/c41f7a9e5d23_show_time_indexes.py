@@ -0,0 +1,28 @@
+"""composite start_time indexes on Show
+
+Revision ID: c41f7a9e5d23
+Revises: 8d2e4b7c1f05
+Create Date: 2026-10-17 11:26:05.317402
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c41f7a9e5d23"
+down_revision = "8d2e4b7c1f05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_show_venue_id_start_time", "Show", ["venue_id", "start_time"])
+    op.create_index("ix_show_artist_id_start_time", "Show", ["artist_id", "start_time"])
+    op.create_index("ix_show_start_time", "Show", ["start_time"])
+
+
+def downgrade():
+    op.drop_index("ix_show_start_time", table_name="Show")
+    op.drop_index("ix_show_artist_id_start_time", table_name="Show")
+    op.drop_index("ix_show_venue_id_start_time", table_name="Show")
@@ -0,0 +1,70 @@
+"""ShowArchive, cold storage for long-past shows
+
+Revision ID: c5d2a8f1e934
+Revises: b8d4f0e7c356
+Create Date: 2026-10-17 18:02:41.527093
+
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c5d2a8f1e934"
+down_revision = "b8d4f0e7c356"
+branch_labels = None
+depends_on = None
+
+ARCHIVED_COLUMNS = ["id", "venue_id", "artist_id", "start_time", "end_time"]
+
+
+def upgrade():
+    # Filled by "flask archive-shows"; rows keep the id they had in Show.
+    op.create_table(
+        "ShowArchive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("venue_id", sa.Integer(), nullable=False),
+        sa.Column("artist_id", sa.Integer(), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["artist_id"], ["Artist.id"]),
+        sa.ForeignKeyConstraint(["venue_id"], ["Venue.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_show_archive_venue_id_start_time",
+        "ShowArchive",
+        ["venue_id", "start_time"],
+    )
+    op.create_index(
+        "ix_show_archive_artist_id_start_time",
+        "ShowArchive",
+        ["artist_id", "start_time"],
+    )
+
+
+def downgrade():
+    # Archived shows go back to Show rather than being lost.
+    archive = sa.table(
+        "ShowArchive",
+        *[sa.column(name) for name in ARCHIVED_COLUMNS],
+    )
+    show = sa.table(
+        "Show",
+        *[sa.column(name) for name in ARCHIVED_COLUMNS],
+        sa.column("updated_at", sa.DateTime),
+    )
+    op.execute(
+        show.insert().from_select(
+            ARCHIVED_COLUMNS + ["updated_at"],
+            sa.select(
+                *[archive.c[name] for name in ARCHIVED_COLUMNS],
+                sa.literal(datetime.utcnow(), sa.DateTime),
+            ),
+        )
+    )
+    op.drop_index("ix_show_archive_artist_id_start_time", table_name="ShowArchive")
+    op.drop_index("ix_show_archive_venue_id_start_time", table_name="ShowArchive")
+    op.drop_table("ShowArchive")
@@ -0,0 +1,47 @@
+"""trigram search indexes on VenueGenre.genre and ArtistGenre.genre
+
+Revision ID: d9e6b2a4f158
+Revises: c5d2a8f1e934
+Create Date: 2026-10-17 19:02:37.418926
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "d9e6b2a4f158"
+down_revision = "c5d2a8f1e934"
+branch_labels = None
+depends_on = None
+
+# Genre tables searched with ILIKE '%term%' by search_statements()
+GENRE_TABLES = ["VenueGenre", "ArtistGenre"]
+
+
+def index_name(table):
+    return f"ix_{table.lower()}_genre_trgm"
+
+
+def upgrade():
+    # Like the name/city/state indexes in 3a9c0f6e2b71, so every branch of the
+    # search union is answered from a GIN trigram index.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table in GENRE_TABLES:
+        op.create_index(
+            index_name(table),
+            table,
+            ["genre"],
+            postgresql_using="gin",
+            postgresql_ops={"genre": "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table in GENRE_TABLES:
+        op.drop_index(index_name(table), table_name=table)
@@ -0,0 +1,83 @@
+"""materialized upcoming/past show counters on Venue and Artist
+
+Revision ID: e5b3d8a2c917
+Revises: c41f7a9e5d23
+Create Date: 2026-10-17 12:02:41.550813
+
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e5b3d8a2c917"
+down_revision = "c41f7a9e5d23"
+branch_labels = None
+depends_on = None
+
+# (owner table, Show foreign key column)
+COUNTED_TABLES = [("Venue", "venue_id"), ("Artist", "artist_id")]
+
+
+def upgrade():
+    for owner, _ in COUNTED_TABLES:
+        with op.batch_alter_table(owner) as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "upcoming_shows_count",
+                    sa.Integer(),
+                    nullable=False,
+                    server_default="0",
+                )
+            )
+            batch_op.add_column(
+                sa.Column(
+                    "past_shows_count", sa.Integer(), nullable=False, server_default="0"
+                )
+            )
+
+    roll = op.create_table(
+        "ShowCounterRoll",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("rolled_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Backfill: one correlated UPDATE per table, split at the migration time.
+    now = datetime.now()
+    show = sa.table(
+        "Show",
+        sa.column("id", sa.Integer),
+        sa.column("venue_id", sa.Integer),
+        sa.column("artist_id", sa.Integer),
+        sa.column("start_time", sa.DateTime),
+    )
+    for owner, fk in COUNTED_TABLES:
+        counted = sa.table(
+            owner,
+            sa.column("id", sa.Integer),
+            sa.column("upcoming_shows_count", sa.Integer),
+            sa.column("past_shows_count", sa.Integer),
+        )
+        shows = sa.select(sa.func.count(show.c.id)).where(show.c[fk] == counted.c.id)
+        op.execute(
+            counted.update().values(
+                upcoming_shows_count=shows.where(
+                    show.c.start_time > now
+                ).scalar_subquery(),
+                past_shows_count=shows.where(
+                    show.c.start_time <= now
+                ).scalar_subquery(),
+            )
+        )
+    op.bulk_insert(roll, [{"id": 1, "rolled_at": now}])
+
+
+def downgrade():
+    op.drop_table("ShowCounterRoll")
+    for owner, _ in COUNTED_TABLES:
+        with op.batch_alter_table(owner) as batch_op:
+            batch_op.drop_column("past_shows_count")
+            batch_op.drop_column("upcoming_shows_count")
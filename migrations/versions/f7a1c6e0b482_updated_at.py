@@ -0,0 +1,40 @@
+"""updated_at on Venue, Artist and Show
+
+Revision ID: f7a1c6e0b482
+Revises: e5b3d8a2c917
+Create Date: 2026-10-17 12:40:19.204377
+
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f7a1c6e0b482"
+down_revision = "e5b3d8a2c917"
+branch_labels = None
+depends_on = None
+
+TABLES = ["Venue", "Artist", "Show"]
+
+
+def upgrade():
+    # Added nullable and backfilled first: SQLite cannot add a NOT NULL column
+    # with a non-constant default.
+    now = datetime.utcnow()
+    for name in TABLES:
+        op.add_column(name, sa.Column("updated_at", sa.DateTime(), nullable=True))
+        table = sa.table(name, sa.column("updated_at", sa.DateTime))
+        op.execute(table.update().values(updated_at=now))
+        with op.batch_alter_table(name) as batch_op:
+            batch_op.alter_column(
+                "updated_at", existing_type=sa.DateTime(), nullable=False
+            )
+
+
+def downgrade():
+    for name in reversed(TABLES):
+        with op.batch_alter_table(name) as batch_op:
+            batch_op.drop_column("updated_at")
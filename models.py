@@ -1,16 +1,47 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_migrate import Migrate
+from sqlalchemy import DDL, event
+from sqlalchemy.ext.associationproxy import association_proxy
 
-app = Flask(__name__)
-db = SQLAlchemy(app)
+from replicas import RoutingSQLAlchemy
+
+# Unbound extensions; create_app() in app.py binds them to the application.
+db = RoutingSQLAlchemy()
+migrate = Migrate()
 
-migrate = Migrate(app, db)
 
 # ----------------------------------------------------------------------------#
 # Models.
 # ----------------------------------------------------------------------------#
+class VenueGenre(db.Model):
+    __tablename__ = "VenueGenre"
+
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey("Venue.id", ondelete="CASCADE"), primary_key=True
+    )
+    genre = db.Column(db.String(120), primary_key=True)
+
+    # Lookups go genre -> venues, so the genre needs its own leading index.
+    __table_args__ = (db.Index("ix_venue_genre_genre", "genre", "venue_id"),)
+
+    def __repr__(self):
+        return f"<VenueGenre venue_id:{self.venue_id}, genre:{self.genre}>"
+
+
+class ArtistGenre(db.Model):
+    __tablename__ = "ArtistGenre"
+
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey("Artist.id", ondelete="CASCADE"), primary_key=True
+    )
+    genre = db.Column(db.String(120), primary_key=True)
+
+    __table_args__ = (db.Index("ix_artist_genre_genre", "genre", "artist_id"),)
+
+    def __repr__(self):
+        return f"<ArtistGenre artist_id:{self.artist_id}, genre:{self.genre}>"
+
+
 class Venue(db.Model):
     __tablename__ = "Venue"
 
@@ -24,11 +55,37 @@ class Venue(db.Model):
     facebook_link = db.Column(db.String(120), nullable=True)
 
     # TODO: implement any missing fields, as a database migration using Flask-Migrate
-    genres = db.Column(db.PickleType, nullable=False)
+    genre_links = db.relationship(
+        "VenueGenre", cascade="all, delete-orphan", order_by="VenueGenre.genre"
+    )
+    # Read and assigned as a plain list of genre names
+    genres = association_proxy(
+        "genre_links", "genre", creator=lambda genre: VenueGenre(genre=genre)
+    )
     website = db.Column(db.String(120), nullable=True)
     seeking_talent = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(120), nullable=True)
+    # Bumped on every change; detail pages derive ETag/Last-Modified from it.
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
     shows = db.relationship("Show", backref="venue", lazy=True)
+    # Denormalized show counts as of ShowCounterRoll.rolled_at, kept current by
+    # counters.py so listings read them without touching Show.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+
+    # /venues lists venues by state and city; the calendar filters on them.
+    __table_args__ = (db.Index("ix_venue_state_city", "state", "city"),)
+
+    @classmethod
+    def with_genre(cls, genre):
+        # Filter criterion matching venues tagged with genre, evaluated in the database.
+        return cls.genre_links.any(VenueGenre.genre == genre)
 
     def __repr__(self):
         return f"<Venue {self.id}, name:{self.name}, city:{self.city}, state:{self.state}, address:{self.address}, image_link:{self.image_link}, facebook_link:{self.facebook_link}, genres:{self.genres}, website:{self.website}, seeking_talent:{self.seeking_talent}, seeking_description:{self.seeking_description}, shows:{self.shows}>"
@@ -42,7 +99,13 @@ class Artist(db.Model):
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120), nullable=True)
-    genres = db.Column(db.PickleType, nullable=False)
+    genre_links = db.relationship(
+        "ArtistGenre", cascade="all, delete-orphan", order_by="ArtistGenre.genre"
+    )
+    # Read and assigned as a plain list of genre names
+    genres = association_proxy(
+        "genre_links", "genre", creator=lambda genre: ArtistGenre(genre=genre)
+    )
     image_link = db.Column(db.String(500), nullable=False)
     facebook_link = db.Column(db.String(120), nullable=True)
 
@@ -50,12 +113,50 @@ class Artist(db.Model):
     website = db.Column(db.String(120), nullable=True)
     seeking_venue = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(120), nullable=True)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
     shows = db.relationship("Show", backref="artist", lazy=True)
+    # Maintained by counters.py, like Venue's.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+
+    @classmethod
+    def with_genre(cls, genre):
+        # Filter criterion matching artists tagged with genre, evaluated in the database.
+        return cls.genre_links.any(ArtistGenre.genre == genre)
 
     def __repr__(self):
         return f"<Venue {self.id}, name:{self.name}, city:{self.city}, state:{self.state}, image_link:{self.image_link}, facebook_link:{self.facebook_link}, genres:{self.genres}, website:{self.website}, seeking_talent:{self.seeking_venue}, seeking_description:{self.seeking_description}, shows:{self.shows}>"
 
 
+class ShowCounterRoll(db.Model):
+    # Single row: the moment the Venue/Artist show counters were last rolled
+    # forward. Shows starting after rolled_at are counted as upcoming.
+    __tablename__ = "ShowCounterRoll"
+
+    id = db.Column(db.Integer, primary_key=True)
+    rolled_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<ShowCounterRoll rolled_at:{self.rolled_at}>"
+
+
+# A show books its venue and artist from start_time to end_time. Shows listed
+# without a duration get the default one; none may run longer than the maximum,
+# which bounds the index range bookings.py scans for overlapping shows.
+DEFAULT_SHOW_DURATION = timedelta(hours=2)
+MAX_SHOW_DURATION = timedelta(hours=24)
+
+
+def default_end_time(context):
+    return context.get_current_parameters()["start_time"] + DEFAULT_SHOW_DURATION
+
+
 # TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
 class Show(db.Model):
     __tablename__ = "Show"
@@ -67,6 +168,63 @@ class Show(db.Model):
     start_time = db.Column(
         db.DateTime, nullable=False, default=datetime.utcnow
     )  # Start time required field
+    end_time = db.Column(db.DateTime, nullable=False, default=default_end_time)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # Detail pages filter on venue_id/artist_id and order by start_time; the
+    # /shows listing and upcoming counts range over start_time alone.
+    __table_args__ = (
+        db.Index("ix_show_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_show_artist_id_start_time", "artist_id", "start_time"),
+        db.Index("ix_show_start_time", "start_time"),
+        db.CheckConstraint("end_time >= start_time", name="ck_show_end_time"),
+    )
 
     def __repr__(self):
         return f"<Todo {self.id}, venue_id:{self.venue_id}, artist_id:{self.artist_id}, start_time:{self.start_time}>"
+
+
+class ShowArchive(db.Model):
+    # Shows that started more than ARCHIVE_AFTER_DAYS ago, moved out of Show by
+    # archive.py so that Show and its indexes only hold recent and upcoming
+    # shows. Rows keep their Show id.
+    __tablename__ = "ShowArchive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+
+    # Read per venue or artist, newest first, by the past show history pages.
+    __table_args__ = (
+        db.Index("ix_show_archive_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_show_archive_artist_id_start_time", "artist_id", "start_time"),
+    )
+
+    def __repr__(self):
+        return f"<ShowArchive {self.id}, venue_id:{self.venue_id}, artist_id:{self.artist_id}, start_time:{self.start_time}>"
+
+
+# In Postgres, GiST exclusion constraints reject overlapping shows per venue and
+# per artist, including ones committed concurrently (see bookings.py).
+SHOW_EXCLUSION_CONSTRAINTS = {
+    "ex_show_venue_overlap": "venue_id",
+    "ex_show_artist_overlap": "artist_id",
+}
+event.listen(
+    Show.__table__,
+    "after_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+for name, column in SHOW_EXCLUSION_CONSTRAINTS.items():
+    event.listen(
+        Show.__table__,
+        "after_create",
+        DDL(
+            f'ALTER TABLE "Show" ADD CONSTRAINT {name} EXCLUDE USING gist '
+            f"({column} WITH =, tsrange(start_time, end_time) WITH &&)"
+        ).execute_if(dialect="postgresql"),
+    )
@@ -0,0 +1,249 @@
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import attrgetter
+
+from sqlalchemy import and_, case, func, or_, select, union_all
+from sqlalchemy.orm import selectinload
+
+from models import Venue, Artist, Show, ShowArchive
+
+# ----------------------------------------------------------------------------#
+# Read queries.
+# ----------------------------------------------------------------------------#
+# The statements behind the read-only pages, built as select() constructs so
+# the WSGI views (db.session) and the asyncio read path (asgi.py, AsyncSession)
+# run the same SQL, plus the helpers that shape their rows for the templates.
+
+
+def venue_listing(genre=None):
+    # num_upcoming_shows comes from the materialized Venue.upcoming_shows_count
+    # (see counters.py), so one plain query returns every venue ordered by state, then city.
+    stmt = select(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label("num_upcoming_shows"),
+    )
+    if genre:
+        stmt = stmt.where(Venue.with_genre(genre))
+    return stmt.order_by(Venue.state, Venue.city, Venue.id)
+
+
+def venue_areas(rows):
+    # A list of dictionaries, with city, state, and venues serving as the dictionary keys.
+    # Rows are already sorted by location, so a single pass groups them.
+    return [
+        {
+            "city": city,
+            "state": state,
+            "venues": [
+                {
+                    "id": venue.id,
+                    "name": venue.name,
+                    "num_upcoming_shows": venue.num_upcoming_shows,
+                }
+                for venue in area_venues
+            ],
+        }
+        for (city, state), area_venues in groupby(rows, key=attrgetter("city", "state"))
+    ]
+
+
+def artist_page(genre, after, before, per_page):
+    # Keyset-paginated on id: "after" continues past the last id of the previous
+    # page and "before" steps back from the first id of the next one, so each
+    # page is one bounded primary-key range scan. One extra row is fetched to
+    # know whether there is another page that way.
+    stmt = select(Artist.id, Artist.name, Artist.image_link)
+    if genre:
+        stmt = stmt.where(Artist.with_genre(genre))
+
+    if before is not None:
+        stmt = stmt.where(Artist.id < before).order_by(Artist.id.desc())
+    else:
+        if after is not None:
+            stmt = stmt.where(Artist.id > after)
+        stmt = stmt.order_by(Artist.id)
+    return stmt.limit(per_page + 1)
+
+
+def artist_page_data(rows, after, before, per_page):
+    # Returns (artists, prev_before, next_after) for the rows of artist_page().
+    if before is not None:
+        has_prev = len(rows) > per_page
+        has_next = True
+        rows = rows[:per_page][::-1]
+    else:
+        has_prev = after is not None
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+
+    data = [
+        {"id": artist.id, "name": artist.name, "image_link": artist.image_link}
+        for artist in rows
+    ]
+    prev_before = rows[0].id if rows and has_prev else None
+    next_after = rows[-1].id if rows and has_next else None
+    return data, prev_before, next_after
+
+
+def show_page(after, per_page, *criteria):
+    # Keyset-paginated on (start_time, id): "after" is the id of the last show
+    # on the previous page, so every page is a single indexed query no matter
+    # how deep into the listing it is. criteria narrow the listing (see
+    # calendar_criteria()).
+    stmt = (
+        select(
+            Show.id,
+            Show.venue_id,
+            Show.artist_id,
+            Show.start_time,
+            Show.end_time,
+            Venue.name.label("venue_name"),
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+        .where(*criteria)
+    )
+
+    if after is None:
+        # The first page seeks from the earliest show, so it is an index range
+        # scan like the others rather than a walk from the start of the index.
+        first_start_time = select(func.min(Show.start_time)).scalar_subquery()
+        stmt = stmt.where(Show.start_time >= first_start_time)
+    else:
+        after_start_time = (
+            select(Show.start_time).where(Show.id == after).scalar_subquery()
+        )
+        # The plain lower bound lets the start_time index seek to the cursor;
+        # the OR alone would be checked row by row from the first show.
+        stmt = stmt.where(
+            Show.start_time >= after_start_time,
+            or_(
+                Show.start_time > after_start_time,
+                and_(Show.start_time == after_start_time, Show.id > after),
+            ),
+        )
+
+    # Fetch one extra row to know whether there is a next page.
+    return stmt.order_by(Show.start_time, Show.id).limit(per_page + 1)
+
+
+def show_page_data(rows, per_page):
+    # Returns (shows, next_after) for the rows of show_page().
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    data = [
+        {
+            "venue_id": show.venue_id,
+            "venue_name": show.venue_name,
+            "artist_id": show.artist_id,
+            "artist_name": show.artist_name,
+            "artist_image_link": show.artist_image_link,
+            "start_time": show.start_time,
+            "end_time": show.end_time,
+        }
+        for show in rows
+    ]
+    next_after = rows[-1].id if has_next else None
+    return data, next_after
+
+
+def calendar_range(start_date, end_date, today, days):
+    # [start, end) datetimes spanning start_date through end_date; start_date
+    # defaults to today and end_date to days - 1 days after start_date.
+    start_date = start_date or today
+    end_date = end_date or start_date + timedelta(days=days - 1)
+    return (
+        datetime.combine(start_date, time.min),
+        datetime.combine(end_date + timedelta(days=1), time.min),
+    )
+
+
+def calendar_criteria(start, end, city=None, state=None, genre=None):
+    # Shows starting in [start, end), at venues in city and state, by artists
+    # tagged with genre. The date range is answered from the start_time
+    # indexes (btree, plus BRIN in Postgres), a state from Venue's (state, city)
+    # index and the genre from ArtistGenre's.
+    criteria = [Show.start_time >= start, Show.start_time < end]
+    if state:
+        criteria.append(Venue.state == state)
+    if city:
+        criteria.append(func.lower(Venue.city) == city.lower())
+    if genre:
+        criteria.append(Artist.with_genre(genre))
+    return criteria
+
+
+def calendar_days(shows):
+    # Groups show_page_data() shows, in start_time order, into (date, shows) pairs.
+    return [
+        (day, list(day_shows))
+        for day, day_shows in groupby(shows, key=lambda show: show["start_time"].date())
+    ]
+
+
+def page_versions(model, show_key, related, related_key, entity_id, now):
+    # One row of (entity, newest show and related entity updated_at, show count,
+    # most recent start_time that has passed, archived show count), or none when
+    # the entity does not exist. The fourth field moves a show from upcoming to
+    # past. The entity's genres are loaded with it.
+    archive_key = getattr(ShowArchive, show_key.key)
+    return (
+        select(
+            model,
+            func.max(Show.updated_at),
+            func.max(related.updated_at),
+            func.count(Show.id),
+            func.max(case((Show.start_time <= now, Show.start_time))),
+            select(func.count(ShowArchive.id))
+            .where(archive_key == model.id)
+            .scalar_subquery(),
+        )
+        .outerjoin(Show, show_key == model.id)
+        .outerjoin(related, related.id == related_key)
+        .where(model.id == entity_id)
+        .group_by(model.id)
+        .options(selectinload(model.genre_links))
+    )
+
+
+def detail_shows(show_key, related, related_key, entity_id):
+    # The rendered columns of every show of one venue or artist, in start_time
+    # order; the other side of each booking comes from related.
+    return (
+        select(related_key, related.name, related.image_link, Show.start_time)
+        .join(related, related_key == related.id)
+        .where(show_key == entity_id)
+        .order_by(Show.start_time)
+    )
+
+
+def past_show_history(show_key, related, related_key, entity_id, before, limit):
+    # The detail_shows() columns of the shows of one venue or artist starting
+    # before `before`, newest first, from Show and ShowArchive. Each table is
+    # read newest first along its (key, start_time) index and cut at limit, so
+    # a page costs the same however much history is archived. A venue's or an
+    # artist's shows never overlap, so start_time alone orders them.
+    branches = []
+    for table in (Show, ShowArchive):
+        key = getattr(table, show_key.key)
+        other_key = getattr(table, related_key.key)
+        branches.append(
+            select(
+                other_key.label(related_key.key),
+                related.name,
+                related.image_link,
+                table.start_time,
+            )
+            .join(related, other_key == related.id)
+            .where(key == entity_id, table.start_time < before)
+            .order_by(table.start_time.desc())
+            .limit(limit)
+            .subquery()
+        )
+    history = union_all(*[select(branch) for branch in branches]).subquery()
+    return select(history).order_by(history.c.start_time.desc()).limit(limit)
@@ -0,0 +1,75 @@
+import random
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, get_state
+from sqlalchemy import event, orm
+
+# ----------------------------------------------------------------------------#
+# Read replicas.
+# ----------------------------------------------------------------------------#
+# Replicas are Flask-SQLAlchemy binds named replica0, replica1, ... (see
+# SQLALCHEMY_BINDS in config.py). Views marked @replica_read pick one replica
+# per request and db.session sends all their queries to it; every other view,
+# any flush and the CLI commands use the primary. Committing during a request
+# pins the client (through its session cookie) to the primary for
+# REPLICA_LAG_SECONDS, so the redirect after a create or edit reads its own write.
+
+REPLICA_PREFIX = "replica"
+PINNED_UNTIL = "_primary_until"
+
+
+def replica_uris(config):
+    # Bind key -> URI of every configured replica.
+    binds = config.get("SQLALCHEMY_BINDS") or {}
+    return {key: uri for key, uri in binds.items() if key.startswith(REPLICA_PREFIX)}
+
+
+def choose_replica():
+    # The bind key of the replica the current request reads from, or None to
+    # read from the primary.
+    keys = list(replica_uris(current_app.config))
+    if not keys or session.get(PINNED_UNTIL, 0) > time.time():
+        return None
+    return random.choice(keys)
+
+
+def replica_read(view):
+    # Sends the queries of a read-only view to a replica.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.replica = choose_replica()
+        return view(*args, **kwargs)
+
+    wrapper.replica_read = True
+    return wrapper
+
+
+def reading_replica():
+    return has_request_context() and g.get("replica") is not None
+
+
+def replica_cache_ttl():
+    # Page data read from a replica may predate a write that has just
+    # invalidated it, so it is cached only for as long as replicas may lag.
+    # None keeps the cache's own TTL.
+    return current_app.config["REPLICA_LAG_SECONDS"] if reading_replica() else None
+
+
+class RoutingSession(SignallingSession):
+    def get_bind(self, mapper=None, clause=None):
+        if reading_replica() and not self._flushing:
+            return get_state(self.app).db.get_engine(self.app, bind=g.replica)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def pin_to_primary(db_session):
+    if has_request_context() and replica_uris(current_app.config):
+        session[PINNED_UNTIL] = time.time() + current_app.config["REPLICA_LAG_SECONDS"]
@@ -2,3 +2,36 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Suggests names in the navbar search box as the user types, from
+// /api/v1/venues/autocomplete or /api/v1/artists/autocomplete.
+(function () {
+  var form = document.querySelector('form.search');
+  if (!form || !window.fetch) return;
+  var input = form.querySelector('input[type=search]');
+  var list = document.createElement('datalist');
+  list.id = 'search-suggestions';
+  form.appendChild(list);
+  input.setAttribute('list', list.id);
+  input.setAttribute('autocomplete', 'off');
+
+  var url = form.getAttribute('action').replace(/search$/, 'autocomplete');
+  var pending = null;
+  input.addEventListener('input', function () {
+    clearTimeout(pending);
+    pending = setTimeout(function () {
+      var term = input.value.trim();
+      if (!term) return;
+      fetch('/api/v1' + url + '?q=' + encodeURIComponent(term))
+        .then(function (response) { return response.json(); })
+        .then(function (result) {
+          list.innerHTML = '';
+          result.data.forEach(function (item) {
+            var option = document.createElement('option');
+            option.value = item.name;
+            list.appendChild(option);
+          });
+        });
+    }, 100);
+  });
+})();
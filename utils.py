@@ -1,39 +1,189 @@
+from collections import namedtuple
+from datetime import timezone
+from functools import lru_cache
+
 import dateutil.parser
 import babel
+import babel.dates
+from sqlalchemy import case, func, select, union
+
+DATETIME_FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=None)
+def datetime_pattern(format, locale):
+    # Parsed Babel pattern and Locale, resolved once per (format, locale).
+    return (
+        babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format)),
+        babel.Locale.parse(locale),
+    )
+
 
+@lru_cache(maxsize=4096)
+def format_datetime(value, format="medium", locale="en"):
+    # Accepts a datetime or a date string. Results are memoized, so a page that
+    # lists many shows at the same time formats each distinct value once.
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    if format in ("short", "long"):
+        # Locale-defined formats; let Babel combine the date and time parts.
+        return babel.dates.format_datetime(value, format, locale=locale)
+    if value.tzinfo is None:
+        # Babel treats naive datetimes as UTC.
+        value = value.replace(tzinfo=timezone.utc)
+    pattern, babel_locale = datetime_pattern(format, locale)
+    return pattern.apply(value, babel_locale)
 
-def format_datetime(value, format="medium"):
-    date = dateutil.parser.parse(value)
-    if format == "full":
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == "medium":
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale="en")
 
+# ----------------------------------------------------------------------------#
+# View models.
+# ----------------------------------------------------------------------------#
+# Detail pages render from plain tuples holding only the fields the templates
+# use. Shows are selected as column rows rather than ORM instances, so no
+# object graph is built per show or outlives the query, and the page cache
+# pickles a few small tuples per page.
 
-def format_show(show):
-    return {
-        "venue_id": show.venue_id,
-        "venue_name": show.venue.name,
-        "artist_id": show.artist_id,
-        "artist_name": show.artist.name,
-        "artist_image_link": show.artist.image_link,
-        "venue_image_link": show.venue.image_link,
-        "start_time": format_datetime(str(show.start_time)),
-    }
+VenueShow = namedtuple(
+    "VenueShow", "artist_id artist_name artist_image_link start_time"
+)
+ArtistShow = namedtuple("ArtistShow", "venue_id venue_name venue_image_link start_time")
 
+VENUE_FIELDS = (
+    "id name city state address phone image_link facebook_link website "
+    "seeking_talent seeking_description"
+).split()
+ARTIST_FIELDS = (
+    "id name city state phone image_link facebook_link website "
+    "seeking_venue seeking_description"
+).split()
+SHOW_FIELDS = (
+    "genres past_shows upcoming_shows past_shows_count upcoming_shows_count"
+).split()
 
-def format_shows(shows):
-    formatted_shows = []
+VenueView = namedtuple("VenueView", VENUE_FIELDS + SHOW_FIELDS)
+ArtistView = namedtuple("ArtistView", ARTIST_FIELDS + SHOW_FIELDS)
+
+
+def partition_shows(shows, now):
+    # Splits shows ordered by start_time into (past, upcoming) in one pass.
+    # Past shows come back most recent first.
+    past_shows = []
+    upcoming_shows = []
     for show in shows:
-        formatted_shows.append(format_show(show))
-    return formatted_shows
+        if show.start_time > now:
+            upcoming_shows.append(show)
+        else:
+            past_shows.append(show)
+    past_shows.reverse()
+    return past_shows, upcoming_shows
+
+
+def detail_view(
+    view,
+    fields,
+    show_view,
+    entity,
+    past_shows,
+    upcoming_shows,
+    past_shows_limit,
+    archived_count,
+):
+    # Shows are rows selected in show_view's field order.
+    # Only the first past_shows_limit past shows are rendered; the count covers all
+    # of them, archived ones included.
+    return view(
+        *[getattr(entity, field) for field in fields],
+        genres=tuple(entity.genres),
+        past_shows=[show_view._make(show) for show in past_shows[:past_shows_limit]],
+        upcoming_shows=[show_view._make(show) for show in upcoming_shows],
+        past_shows_count=len(past_shows) + archived_count,
+        upcoming_shows_count=len(upcoming_shows),
+    )
+
+
+def venue_view(
+    venue, past_shows, upcoming_shows, past_shows_limit=None, archived_count=0
+):
+    return detail_view(
+        VenueView,
+        VENUE_FIELDS,
+        VenueShow,
+        venue,
+        past_shows,
+        upcoming_shows,
+        past_shows_limit,
+        archived_count,
+    )
+
+
+def artist_view(
+    artist, past_shows, upcoming_shows, past_shows_limit=None, archived_count=0
+):
+    return detail_view(
+        ArtistView,
+        ARTIST_FIELDS,
+        ArtistShow,
+        artist,
+        past_shows,
+        upcoming_shows,
+        past_shows_limit,
+        archived_count,
+    )
+
+
+def escape_like(term, escape="\\"):
+    # Escape LIKE wildcards so user input is matched literally.
+    return (
+        term.replace(escape, escape * 2)
+        .replace("%", escape + "%")
+        .replace("_", escape + "_")
+    )
+
+
+def search_statements(model, search_term, page, per_page):
+    # Matches search_term against name, city, state and genres, and ranks
+    # exact name matches first, then name prefixes, then names containing the
+    # term, then city/state/genre matches. The matching ids are collected as a
+    # union of one select per column rather than one OR: each branch can then
+    # use its own trigram index in Postgres, which an OR with a genre EXISTS
+    # could not. Returns the statements counting all matches and selecting the
+    # requested page of (id, name) rows.
+    term = escape_like(search_term)
+    contains = "%" + term + "%"
+    genre_link = model.genre_links.property.mapper.class_
+    (owner_id,) = model.genre_links.property.remote_side
+
+    matches = union(
+        select(model.id.label("id")).where(model.name.ilike(contains, escape="\\")),
+        select(model.id.label("id")).where(model.city.ilike(contains, escape="\\")),
+        select(model.id.label("id")).where(model.state.ilike(contains, escape="\\")),
+        select(owner_id.label("id")).where(
+            genre_link.genre.ilike(contains, escape="\\")
+        ),
+    ).subquery()
+
+    rank = case(
+        (func.lower(model.name) == search_term.lower(), 0),
+        (model.name.ilike(term + "%", escape="\\"), 1),
+        (model.name.ilike(contains, escape="\\"), 2),
+        else_=3,
+    )
+
+    count = select(func.count()).select_from(matches)
+    rows = (
+        select(model.id, model.name)
+        .join(matches, matches.c.id == model.id)
+        .order_by(rank, model.name, model.id)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    )
+    return count, rows
 
 
-def format_artist_venue(artist_venue, past_shows, upcoming_shows):
-    data = artist_venue.__dict__
-    data["past_shows"] = format_shows(past_shows)
-    data["upcoming_shows"] = format_shows(upcoming_shows)
-    data["past_shows_count"] = len(past_shows)
-    data["upcoming_shows_count"] = len(upcoming_shows)
-    return data
+def search_ranked(session, model, search_term, page, per_page):
+    # Returns the total number of matches and the requested page of (id, name) rows.
+    count, rows = search_statements(model, search_term, page, per_page)
+    return session.execute(count).scalar(), session.execute(rows).all()